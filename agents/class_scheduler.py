@@ -0,0 +1,251 @@
+import heapq
+import time
+import numpy as np
+
+
+DAYS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+
+def capacity_matrix(tutors, rooms, group_size=1):
+    """Capacité d'accueil par créneau (7 × 24) : min(tuteurs, salles) × taille des groupes
+
+    ``tutors`` et ``rooms`` sont des nombres ou des tableaux 7 × 24.
+    """
+    tutors = np.broadcast_to(np.asarray(tutors, dtype=np.int64), (7, 24))
+    rooms = np.broadcast_to(np.asarray(rooms, dtype=np.int64), (7, 24))
+    return np.minimum(tutors, rooms) * int(group_size)
+
+
+class ClassScheduleOptimizer:
+    """Affectation de créneaux de tutorat à toute une classe sous contraintes de capacité
+
+    Chaque étudiant fournit une liste ordonnée de créneaux préférés ``(jour, heure)``.
+    Une affectation gloutonne par file de priorité sert d'abord les premiers choix de tous
+    les étudiants (les moins flexibles en premier), puis les seconds choix, etc. Une recherche
+    locale améliore ensuite le résultat par déplacements vers des places libérées et par
+    échanges entre deux étudiants. Un étudiant a au plus une séance par jour.
+    """
+
+    def __init__(self, capacity, sessions_per_student=2, max_choices=12, local_search_rounds=3, swap_scan=50):
+        self.capacity = np.asarray(capacity, dtype=np.int64).reshape(7 * 24)
+        self.sessions_per_student = sessions_per_student
+        self.max_choices = max_choices
+        self.local_search_rounds = local_search_rounds
+        self.swap_scan = swap_scan
+
+    def optimize(self, preferences):
+        """Calcule les affectations et le rapport de satisfaction
+
+        ``preferences`` associe à chaque étudiant sa liste ordonnée de créneaux ``(jour, heure)``.
+        """
+        start = time.perf_counter()
+        student_ids = list(preferences)
+        choices = []
+        for student_id in student_ids:
+            slots = []
+            for day, hour in preferences[student_id]:
+                slot = int(day) * 24 + int(hour)
+                if slot not in slots:
+                    slots.append(slot)
+                if len(slots) == self.max_choices:
+                    break
+            choices.append(slots)
+        ranks = [{slot: rank for rank, slot in enumerate(slots)} for slots in choices]
+
+        self._capacity = self.capacity.tolist()
+        self._load = [0] * len(self._capacity)
+        self._members = [set() for _ in self._capacity]
+        # Membres de chaque créneau par rang, et étudiants ayant choisi chaque créneau (échanges)
+        self._members_by_rank = [{} for _ in self._capacity]
+        self._wanted_by = [set() for _ in self._capacity]
+        for student, slots in enumerate(choices):
+            for slot in slots:
+                self._wanted_by[slot].add(student)
+        self._assigned = [{} for _ in student_ids]  # créneau -> rang (max_choices hors préférences)
+
+        self._greedy(choices)
+        self._fallback(choices)
+        improvements = self._local_search(choices, ranks)
+
+        return self._report(student_ids, improvements, time.perf_counter() - start)
+
+    def _days(self, student):
+        return {slot // 24 for slot in self._assigned[student]}
+
+    def _assign(self, student, slot, rank):
+        self._assigned[student][slot] = rank
+        self._load[slot] += 1
+        self._members[slot].add(student)
+        self._members_by_rank[slot].setdefault(rank, set()).add(student)
+
+    def _unassign(self, student, slot):
+        rank = self._assigned[student].pop(slot)
+        self._load[slot] -= 1
+        self._members[slot].discard(student)
+        members = self._members_by_rank[slot][rank]
+        members.discard(student)
+        if not members:
+            del self._members_by_rank[slot][rank]
+
+    def _greedy(self, choices):
+        """Sert les choix par rang croissant, les étudiants les moins flexibles d'abord"""
+        sessions = self.sessions_per_student
+        next_rank = [0] * len(choices)
+        heap = [(0, len(slots), student) for student, slots in enumerate(choices) if slots]
+        heapq.heapify(heap)
+
+        while heap:
+            rank, flexibility, student = heapq.heappop(heap)
+            slots = choices[student]
+            days = self._days(student)
+            position = next_rank[student]
+            while position < len(slots) and (
+                self._load[slots[position]] >= self._capacity[slots[position]] or slots[position] // 24 in days
+            ):
+                position += 1
+            next_rank[student] = position
+            if position >= len(slots):
+                continue
+            if position > rank:
+                # Le choix attendu n'est plus disponible : repasser derrière les choix de meilleur rang
+                heapq.heappush(heap, (position, flexibility, student))
+                continue
+
+            self._assign(student, slots[position], position)
+            next_rank[student] = position + 1
+            if len(self._assigned[student]) < sessions:
+                heapq.heappush(heap, (position + 1, flexibility, student))
+
+    def _fallback(self, choices):
+        """Place les séances restantes sur les créneaux libres les plus proches du premier choix
+
+        À distance égale de l'heure préférée, les créneaux les moins chargés passent en premier.
+        Les heures sont parcourues dans un ordre précalculé pour chacune des 24 heures préférées,
+        et les heures déjà pleines sont sautées sans examiner leurs créneaux.
+        """
+        sessions = min(self.sessions_per_student, 7)
+        open_slots = [[slot for slot in range(hour, 7 * 24, 24) if self._capacity[slot] > 0] for hour in range(24)]
+        free_seats = [sum(self._capacity[slot] - self._load[slot] for slot in slots) for slots in open_slots]
+        # Pour chaque heure préférée, les heures regroupées par distance croissante
+        hours_by_distance = [
+            [sorted({preferred - distance, preferred + distance} & set(range(24))) for distance in range(24)]
+            for preferred in range(24)
+        ]
+
+        for student, slots in enumerate(choices):
+            if len(self._assigned[student]) >= sessions:
+                continue
+            preferred_hour = slots[0] % 24 if slots else 9
+            for hours in hours_by_distance[preferred_hour]:
+                hours = [hour for hour in hours if free_seats[hour] > 0]
+                if not hours:
+                    continue
+                candidates = sorted(
+                    (slot for hour in hours for slot in open_slots[hour]),
+                    key=lambda s: (self._load[s] / self._capacity[s], s)
+                )
+                for slot in candidates:
+                    if len(self._assigned[student]) >= sessions:
+                        break
+                    if self._load[slot] < self._capacity[slot] and slot // 24 not in self._days(student):
+                        self._assign(student, slot, self.max_choices)
+                        free_seats[slot % 24] -= 1
+                if len(self._assigned[student]) >= sessions:
+                    break
+
+    def _local_search(self, choices, ranks):
+        """Déplacements et échanges qui réduisent la somme des rangs affectés"""
+        improvements = 0
+        for _ in range(self.local_search_rounds):
+            improved = 0
+            for student in range(len(choices)):
+                for slot, rank in sorted(self._assigned[student].items(), key=lambda item: -item[1]):
+                    if rank == 0 or slot not in self._assigned[student]:
+                        continue
+                    if self._improve(student, slot, rank, choices[student], ranks):
+                        improved += 1
+            improvements += improved
+            if not improved:
+                break
+        return improvements
+
+    def _improve(self, student, slot, rank, slots, ranks):
+        days = self._days(student) - {slot // 24}
+        for better_rank, target in enumerate(slots[:rank]):
+            if target in self._assigned[student] or target // 24 in days:
+                continue
+
+            # Place libérée : simple déplacement
+            if self._load[target] < self._capacity[target]:
+                self._unassign(student, slot)
+                self._assign(student, target, better_rank)
+                return True
+
+            # Échange avec un étudiant du créneau visé qui y perd moins que nous n'y gagnons. Sans
+            # préférence pour notre créneau, il n'est candidat que si son rang dépasse ``threshold``
+            threshold = self.max_choices - rank + better_rank
+            candidates = self._wanted_by[slot] & self._members[target]
+            for other_rank, members in self._members_by_rank[target].items():
+                if other_rank > threshold:
+                    candidates |= members
+            for scanned, other in enumerate(candidates):
+                if scanned >= self.swap_scan:
+                    break
+                other_rank = self._assigned[other][target]
+                other_new_rank = ranks[other].get(slot, self.max_choices)
+                if slot in self._assigned[other] or slot // 24 in (self._days(other) - {target // 24}):
+                    continue
+                if (rank - better_rank) + (other_rank - other_new_rank) > 0:
+                    self._unassign(student, slot)
+                    self._unassign(other, target)
+                    self._assign(student, target, better_rank)
+                    self._assign(other, slot, other_new_rank)
+                    return True
+        return False
+
+    def _report(self, student_ids, improvements, elapsed):
+        sessions = min(self.sessions_per_student, 7)
+        students = {}
+        satisfaction_total = 0.0
+        first_choices = 0
+        outside = 0
+        assigned_sessions = 0
+        for student, student_id in enumerate(student_ids):
+            assigned = sorted(self._assigned[student].items(), key=lambda item: item[1])
+            # Au mieux, la j-ième séance obtient le j-ième choix
+            session_scores = [
+                max(0.0, 1.0 - max(0, rank - j) / self.max_choices) if rank < self.max_choices else 0.0
+                for j, (_, rank) in enumerate(assigned)
+            ]
+            satisfaction = sum(session_scores) / sessions if sessions else 1.0
+            satisfaction_total += satisfaction
+            first_choices += sum(1 for _, rank in assigned if rank < sessions)
+            outside += sum(1 for _, rank in assigned if rank >= self.max_choices)
+            assigned_sessions += len(assigned)
+            students[student_id] = {
+                "slots": [
+                    {"day": DAYS[slot // 24], "hour": slot % 24, "rank": rank if rank < self.max_choices else None}
+                    for slot, rank in sorted(assigned)
+                ],
+                "satisfaction": round(satisfaction, 3),
+                "complete": len(assigned) >= sessions
+            }
+
+        requested = sessions * len(student_ids)
+        used = int(sum(self._load))
+        capacity = int(sum(self._capacity))
+        return {
+            "assignments": students,
+            "summary": {
+                "students": len(student_ids),
+                "sessions_requested": requested,
+                "sessions_assigned": assigned_sessions,
+                "unassigned_sessions": requested - assigned_sessions,
+                "top_choice_rate": first_choices / requested if requested else 1.0,
+                "outside_preferences": outside,
+                "mean_satisfaction": satisfaction_total / len(student_ids) if student_ids else 1.0,
+                "capacity_utilization": used / capacity if capacity else 0.0,
+                "local_search_improvements": improvements,
+                "elapsed_seconds": round(elapsed, 3)
+            }
+        }
@@ -1,25 +1,94 @@
 import json
+import threading
+from functools import partial
 from pathlib import Path
 import pandas as pd
-from datetime import datetime
-import google.generativeai as genai
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-import os
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics.pairwise import cosine_similarity
+from .relevance_scoring import RelevanceScorer
+from .json_stream import IncrementalJSONArrayParser
+from .llm_gateway import get_llm_gateway
+from models.collaborative_filtering import CollaborativeFilteringRecommender
+from models.difficulty_calibration import DifficultyCalibrator
+from .learning_records import get_learning_log
+from .content_catalog import get_content_catalog
+from .content_harvester import ContentHarvester, canonicalize_url, is_allowed_domain
+from .learning_indexes import ContentStatsIndex, StudentContentIndex
+
+
+# Dernière génération LLM par (catalogue, sujet, module), commune à toutes les instances de l'agent
+_generation_times = {}
+_generation_lock = threading.Lock()
+
+
+def _declared_difficulty(catalog, content_id):
+    """Difficulté déclarée par l'auteur dans le catalogue"""
+    content = catalog.get(content_id)
+    return content.get("difficulty") if content else None
+
 
 class ContentAgent:
+    # Configuration de sécurité pour Gemini
+    SAFETY_SETTINGS = [
+        {
+            "category": "HARM_CATEGORY_HARASSMENT",
+            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+        },
+        {
+            "category": "HARM_CATEGORY_HATE_SPEECH",
+            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+        }
+    ]
+
+    # Plateformes dont les liens sont acceptés
+    VALID_DOMAINS = [
+        "youtube.com", "youtu.be",
+        "khanacademy.org",
+        "coursera.org",
+        "edx.org",
+        "ocw.mit.edu",
+        "fun-mooc.fr"
+    ]
+
+    # Nombre d'observations à partir duquel la difficulté calibrée remplace la difficulté déclarée
+    MIN_CALIBRATION_OBSERVATIONS = 3
+
+    # Au-delà de ce délai sans génération, le catalogue d'un sujet est complété par Gemini
+    CATALOG_REFRESH_INTERVAL = timedelta(hours=24)
+
     def __init__(self):
         self.data_dir = Path(__file__).parent.parent / "data"
         self.content_file = self.data_dir / "content.json"
         self.learning_data_file = self.data_dir / "learning_data.json"
+        self.peer_model_file = self.data_dir / "peer_model.npz"
+        self.peer_model = None
         
-        # Configuration de Gemini
+        # Configuration de Gemini via la passerelle LLM partagée
         load_dotenv()
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-pro')
+        self.model = get_llm_gateway()
+        
+        # Moteur de scoring vectorisé des recommandations
+        self.relevance_scorer = RelevanceScorer()
         
         self.init_data_files()
+        
+        # Catalogue de contenus indexé, chargé à la première requête
+        self.catalog = get_content_catalog(self.content_file)
+        
+        # Les recommandations LLM validées enrichissent le catalogue
+        self.content_harvester = ContentHarvester(self.catalog, self._validate_recommendation)
+        
+        # Journal partagé des enregistrements et index maintenus à leur arrivée, communs à
+        # toutes les instances de l'agent (un seul abonnement par journal)
+        self.learning_log = get_learning_log(self.learning_data_file)
+        self.content_stats_index = self.learning_log.shared_index("content_stats", ContentStatsIndex)
+        self.student_content_index = self.learning_log.shared_index("student_content", StudentContentIndex)
+        self.difficulty_calibrator = self.learning_log.shared_index(
+            "difficulty_calibration",
+            lambda: DifficultyCalibrator(prior_lookup=partial(_declared_difficulty, self.catalog))
+        )
 
     def init_data_files(self):
         """Initialise les fichiers de données s'ils n'existent pas"""
@@ -75,6 +144,146 @@ class ContentAgent:
 
     def recommend_content(self, student_id, subject=None, preferences=None, count=5):
         """Recommande du contenu personnalisé pour un étudiant en utilisant Gemini"""
+        profile = self._build_student_profile(student_id, preferences)
+        module = (preferences or {}).get("module") or None
+        
+        # Répondre depuis le catalogue lorsqu'il contient assez de contenus pertinents et récents
+        candidates = self._catalog_candidates(subject, module)
+        from_catalog = self._rank_candidates(student_id, candidates, profile, preferences, count)
+        if len(from_catalog) >= count and not self._catalog_is_stale(subject, module, candidates):
+            return from_catalog
+        
+        # Générer des recommandations avec Gemini
+        recommendations = self._generate_recommendations_with_gemini(
+            self._create_recommendation_prompt(profile, subject)
+        ) or []
+        self._mark_generated(subject, module)
+        self._harvest(recommendations, subject, module)
+        
+        # Les nouveautés sont classées avec les contenus déjà connus du catalogue
+        urls = {canonicalize_url(rec.get('resource_url')) for rec in recommendations}
+        known = [item for item in candidates if canonicalize_url(item.get('resource_url')) not in urls]
+        return self._rank_candidates(student_id, recommendations + known, profile, preferences, count)
+
+    def recommend_from_catalog(self, student_id, subject=None, preferences=None, count=5):
+        """Recommande uniquement parmi les contenus du catalogue, sans appel à Gemini"""
+        profile = self._build_student_profile(student_id, preferences)
+        module = (preferences or {}).get("module") or None
+        return self._rank_candidates(
+            student_id, self._catalog_candidates(subject, module), profile, preferences, count
+        )
+
+    def _catalog_is_stale(self, subject=None, module=None, candidates=()):
+        """Indique si aucun contenu n'a été généré pour ce sujet depuis ``CATALOG_REFRESH_INTERVAL``"""
+        with _generation_lock:
+            last = _generation_times.get((str(self.content_file), subject, module))
+        for item in candidates:
+            try:
+                harvested_at = datetime.fromisoformat(item["harvested_at"]) if item.get("harvested_at") else None
+            except (TypeError, ValueError):
+                continue
+            if harvested_at is not None and (last is None or harvested_at > last):
+                last = harvested_at
+        return last is None or datetime.now() - last > self.CATALOG_REFRESH_INTERVAL
+
+    def _mark_generated(self, subject=None, module=None):
+        with _generation_lock:
+            _generation_times[(str(self.content_file), subject, module)] = datetime.now()
+
+    def _rank_candidates(self, student_id, candidates, profile, preferences, count):
+        """Écarte les contenus maîtrisés puis trie selon les préférences (scoring vectorisé)"""
+        candidates = self._prefilter_candidates(student_id, candidates)
+        return self.relevance_scorer.rank(
+            candidates, profile, preferences, count=count, threshold=0.5,
+            difficulty_lookup=self._calibrated_difficulties
+        )
+
+    def _catalog_candidates(self, subject=None, module=None):
+        """Contenus du catalogue disposant d'une ressource en ligne pour le sujet et le module demandés"""
+        return [
+            dict(item) for item in self.catalog.query(subject=subject or None, module=module)
+            if item.get("resource_url")
+        ]
+
+    def _harvest(self, recommendations, subject=None, module=None):
+        """Ajoute au catalogue les recommandations validées encore inconnues"""
+        try:
+            return self.content_harvester.harvest(recommendations, subject=subject, module=module)
+        except Exception as e:
+            print(f"Erreur lors de l'enrichissement du catalogue: {str(e)}")
+            return []
+
+    def stream_recommendations(self, student_id, subject=None, preferences=None, count=5):
+        """Produit les recommandations pertinentes au fur et à mesure de leur génération par Gemini"""
+        profile = self._build_student_profile(student_id, preferences)
+        prompt = self._create_recommendation_prompt(profile, subject)
+        
+        mastered = {
+            content_id for content_id, decision in self.adapt_difficulty_for_student(student_id).items()
+            if decision == "increase_difficulty"
+        }
+        seen_urls = set()
+        validated = []
+        produced = 0
+        try:
+            for rec in self._stream_recommendations_with_gemini(prompt):
+                url = rec.get('resource_url')
+                validated.append(rec)
+                if url in seen_urls or rec.get('id') in mastered:
+                    continue
+                seen_urls.add(url)
+                
+                score = self._calculate_recommendation_relevance(rec, profile, preferences)
+                if score > 0.5:  # Seulement garder les recommandations pertinentes
+                    rec['relevance_score'] = score
+                    yield rec
+                    produced += 1
+                    if produced >= count:
+                        return
+        finally:
+            # Même interrompu, le flux enrichit le catalogue des contenus déjà validés
+            module = (preferences or {}).get("module") or None
+            self._mark_generated(subject, module)
+            self._harvest(validated, subject, module)
+
+    def recommend_from_peers(self, student_id, count=5):
+        """Recommande les contenus réussis par des étudiants au profil similaire, sans appel au LLM"""
+        model = self._get_peer_model()
+        
+        # Projection des scores actuels de l'étudiant (nouvel étudiant compris)
+        self.learning_log.refresh()
+        ratings = self.student_content_index.student_averages(student_id)
+        
+        recommendations = []
+        for content_id, predicted_score in model.recommend(student_id, k=count, ratings=ratings):
+            content = dict(self.catalog.get(content_id) or {"id": content_id})
+            content['peer_score'] = predicted_score
+            recommendations.append(content)
+        return recommendations
+
+    def retrain_peer_model(self):
+        """Réentraîne et sauvegarde le modèle de filtrage collaboratif"""
+        model = CollaborativeFilteringRecommender().fit(self.learning_log.records())
+        model.save(self.peer_model_file)
+        self.peer_model = model
+        return model
+
+    def _get_peer_model(self):
+        """Charge le modèle persisté, ou l'entraîne au premier appel"""
+        if self.peer_model is None:
+            if self.peer_model_file.exists():
+                try:
+                    self.peer_model = CollaborativeFilteringRecommender.load(self.peer_model_file)
+                except Exception as e:
+                    # Sauvegarde illisible (ancien format avec objets Python) : réentraîner
+                    print(f"Erreur lors du chargement du modèle collaboratif: {str(e)}")
+                    self.retrain_peer_model()
+            else:
+                self.retrain_peer_model()
+        return self.peer_model
+
+    def _build_student_profile(self, student_id, preferences=None):
+        """Construit le profil de l'étudiant enrichi de ses préférences"""
         # Charger les données
         with open(self.learning_data_file, "r", encoding='utf-8') as f:
             learning_data = json.load(f)
@@ -100,65 +309,26 @@ class ContentAgent:
                 "learning_goal": preferences.get("learning_goal", "")
             })
         
-        # Générer des recommandations avec Gemini
-        recommendations = self._generate_recommendations_with_gemini(
-            self._create_recommendation_prompt(profile, subject)
-        )
-        
-        # Filtrer et trier les recommandations selon les préférences
-        filtered_recommendations = []
-        for rec in recommendations:
-            score = self._calculate_recommendation_relevance(rec, profile, preferences)
-            if score > 0.5:  # Seulement garder les recommandations pertinentes
-                rec['relevance_score'] = score
-                filtered_recommendations.append(rec)
-        
-        # Trier par pertinence
-        filtered_recommendations.sort(key=lambda x: x['relevance_score'], reverse=True)
+        return profile
         
-        return filtered_recommendations[:count]
-
     def _calculate_recommendation_relevance(self, recommendation, profile, preferences):
         """Calcule la pertinence d'une recommandation selon le profil et les préférences"""
-        score = 0.0
-        weights = {
-            'learning_style': 0.3,
-            'difficulty': 0.2,
-            'duration': 0.15,
-            'content_type': 0.2,
-            'subject_relevance': 0.15
-        }
-        
-        # Vérifier la correspondance du style d'apprentissage
-        if recommendation['type'] == profile['learning_style']:
-            score += weights['learning_style']
-        
-        # Vérifier la difficulté
-        if preferences and 'difficulty' in preferences:
-            diff_match = 1 - abs(recommendation['difficulty'] - preferences['difficulty']) / 4
-            score += weights['difficulty'] * diff_match
-        
-        # Vérifier la durée
-        if preferences and 'duration' in preferences:
-            duration_match = 1 - abs(recommendation['duration'] - preferences['duration']) / preferences['duration']
-            score += weights['duration'] * max(0, duration_match)
-        
-        # Vérifier les types de contenu préférés
-        if preferences and 'content_types' in preferences:
-            content_type_match = any(ct.lower() in recommendation['type'].lower() 
-                                   for ct in preferences['content_types'])
-            if content_type_match:
-                score += weights['content_type']
-        
-        # Vérifier la pertinence du sujet
-        if profile['subject_performance']:
-            subject = recommendation['subject']
-            if subject in profile['subject_performance'].get('score', {}):
-                subject_score = profile['subject_performance']['score'][subject]
-                if subject_score < 0.7:  # Donner priorité aux sujets nécessitant de l'amélioration
-                    score += weights['subject_relevance']
-        
-        return score
+        batch = self.relevance_scorer.encode([recommendation])
+        scores = self.relevance_scorer.score(
+            batch, profile, preferences, difficulty_lookup=self._calibrated_difficulties
+        )
+        return float(scores[0])
+
+    def _calibrated_difficulties(self, content_ids):
+        """Difficultés calibrées sur les résultats de tous les étudiants (NaN si non calibrées)"""
+        return self.difficulty_calibrator.difficulties(
+            content_ids, min_observations=self.MIN_CALIBRATION_OBSERVATIONS
+        )
+
+    def recalibrate_difficulties(self):
+        """Réestime toutes les difficultés à partir de l'historique complet"""
+        self.difficulty_calibrator.refit(self.learning_log.records())
+        return self.difficulty_calibrator
 
     def _analyze_student_profile(self, df):
         """Analyse le profil d'apprentissage de l'étudiant"""
@@ -271,34 +441,13 @@ Les recommandations doivent être parfaitement adaptées au profil et aux préf
         """Génère des recommandations en utilisant Gemini"""
         all_recommendations = []
         try:
-            # Configuration de sécurité pour Gemini
-            safety_settings = [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                }
-            ]
-
-            valid_domains = [
-                "youtube.com", "youtu.be",
-                "khanacademy.org",
-                "coursera.org",
-                "edx.org",
-                "ocw.mit.edu",
-                "fun-mooc.fr"
-            ]
-
             # Première tentative : générer plusieurs réponses
             responses = []
             for _ in range(2):
                 try:
                     response = self.model.generate_content(
                         prompt,
-                        safety_settings=safety_settings,
+                        safety_settings=self.SAFETY_SETTINGS,
                         generation_config={
                             "temperature": 0.7,
                             "top_p": 0.8,
@@ -319,15 +468,7 @@ Les recommandations doivent être parfaitement adaptées au profil et aux préf
                         recommendations = json.loads(content_str[start_idx:end_idx])
                         if recommendations and isinstance(recommendations, list):
                             for rec in recommendations:
-                                url = rec.get('resource_url', '').lower()
-                                if any(domain in url for domain in valid_domains):
-                                    if 'additional_resources' in rec:
-                                        valid_resources = []
-                                        for res in rec['additional_resources']:
-                                            res_url = res.get('url', '').lower()
-                                            if any(domain in res_url for domain in valid_domains):
-                                                valid_resources.append(res)
-                                        rec['additional_resources'] = valid_resources
+                                if self._validate_recommendation(rec):
                                     all_recommendations.append(rec)
                 except Exception as e:
                     print(f"Erreur lors du traitement de la réponse: {str(e)}")
@@ -339,7 +480,7 @@ Les recommandations doivent être parfaitement adaptées au profil et aux préf
                     strict_prompt = prompt + "\nIMPORTANT: Assurez-vous que TOUS les liens sont des URLs réelles et valides des plateformes spécifiées."
                     response = self.model.generate_content(
                         strict_prompt,
-                        safety_settings=safety_settings,
+                        safety_settings=self.SAFETY_SETTINGS,
                         generation_config={
                             "temperature": 0.5,
                             "top_p": 0.9,
@@ -352,8 +493,7 @@ Les recommandations doivent être parfaitement adaptées au profil et aux préf
                     if start_idx != -1 and end_idx != -1:
                         new_recommendations = json.loads(content_str[start_idx:end_idx])
                         for rec in new_recommendations:
-                            url = rec.get('resource_url', '').lower()
-                            if any(domain in url for domain in valid_domains):
+                            if self._validate_recommendation(rec):
                                 all_recommendations.append(rec)
                 except Exception as e:
                     print(f"Erreur lors de la deuxième tentative: {str(e)}")
@@ -404,36 +544,77 @@ Les recommandations doivent être parfaitement adaptées au profil et aux préf
                 print("Échec de la dernière tentative")
                 return []  # Retourner une liste vide en dernier recours
 
+    def _stream_recommendations_with_gemini(self, prompt):
+        """Génère des recommandations en flux et les restitue dès que chaque objet JSON est complet"""
+        parser = IncrementalJSONArrayParser()
+        try:
+            response = self.model.generate_content(
+                prompt,
+                safety_settings=self.SAFETY_SETTINGS,
+                generation_config={
+                    "temperature": 0.7,
+                    "top_p": 0.8,
+                    "top_k": 40
+                },
+                stream=True
+            )
+            for chunk in response:
+                for rec in parser.feed(chunk.text):
+                    if self._validate_recommendation(rec):
+                        yield rec
+                if parser.finished:
+                    break
+        except Exception as e:
+            print(f"Erreur lors de la génération en flux: {str(e)}")
+
+    def _validate_recommendation(self, rec):
+        """Vérifie le domaine d'une recommandation et filtre ses ressources complémentaires"""
+        if not is_allowed_domain(rec.get('resource_url'), self.VALID_DOMAINS):
+            return False
+        
+        if 'additional_resources' in rec:
+            valid_resources = []
+            for res in rec['additional_resources']:
+                if is_allowed_domain(res.get('url'), self.VALID_DOMAINS):
+                    valid_resources.append(res)
+            rec['additional_resources'] = valid_resources
+        return True
+
     def _get_beginner_recommendations(self, subject=None, preferences=None):
         """Fournit des recommandations pour les débutants"""
-        with open(self.content_file, "r", encoding='utf-8') as f:
-            content_data = json.load(f)
-        
-        recommendations = content_data["content_items"]
-        if subject:
-            recommendations = [r for r in recommendations if r["subject"] == subject]
-        
-        # Filtrer pour les contenus de niveau débutant
-        recommendations = [r for r in recommendations if r["difficulty"] <= 2]
-        return recommendations[:5]
+        # Contenus de niveau débutant, filtrés par sujet via les index du catalogue
+        return self.catalog.query(subject=subject or None, max_difficulty=2, limit=5)
 
     def adapt_difficulty(self, student_id, content_id):
         """Adapte la difficulté du contenu en fonction des performances de l'étudiant"""
-        with open(self.learning_data_file, "r", encoding='utf-8') as f:
-            learning_data = json.load(f)
+        self.learning_log.refresh()
 
-        # Analyser les performances récentes
-        student_records = [r for r in learning_data["learning_records"] 
-                         if r["student_id"] == student_id and r["content_id"] == content_id]
-        
-        if not student_records:
+        # Performance moyenne sur ce contenu (index étudiant × contenu)
+        avg_performance = self.student_content_index.average_score(student_id, content_id)
+        if avg_performance is None:
             return "difficulty_unchanged"
 
-        # Calculer la performance moyenne
-        df = pd.DataFrame(student_records)
-        avg_performance = df["score"].mean()
+        return self._difficulty_decision(self._calibrated_performance(student_id, content_id, avg_performance))
+
+    def adapt_difficulty_for_student(self, student_id):
+        """Adapte la difficulté de tous les contenus consultés par l'étudiant en une seule passe"""
+        self.learning_log.refresh()
+        return {
+            content_id: self._difficulty_decision(self._calibrated_performance(student_id, content_id, avg_performance))
+            for content_id, avg_performance in self.student_content_index.student_averages(student_id).items()
+        }
 
-        # Ajuster la difficulté
+    def _calibrated_performance(self, student_id, content_id, avg_performance):
+        """Combine la performance observée et la réussite prédite par la difficulté calibrée"""
+        if self.difficulty_calibrator.item_count(content_id) < self.MIN_CALIBRATION_OBSERVATIONS:
+            return avg_performance
+        predicted = self.difficulty_calibrator.success_probability(student_id, content_id)
+        if predicted is None or pd.isna(avg_performance):
+            return avg_performance
+        return 0.5 * avg_performance + 0.5 * predicted
+
+    def _difficulty_decision(self, avg_performance):
+        """Ajuste la difficulté selon la performance moyenne"""
         if avg_performance > 0.85:
             return "increase_difficulty"
         elif avg_performance < 0.6:
@@ -441,33 +622,31 @@ Les recommandations doivent être parfaitement adaptées au profil et aux préf
         else:
             return "maintain_difficulty"
 
+    def _prefilter_candidates(self, student_id, candidates):
+        """Écarte les contenus déjà maîtrisés par l'étudiant"""
+        decisions = self.adapt_difficulty_for_student(student_id)
+        if not decisions:
+            return candidates
+        return [c for c in candidates if decisions.get(c.get('id')) != "increase_difficulty"]
+
     def get_content_stats(self, content_id=None):
         """Obtient les statistiques d'utilisation du contenu"""
-        with open(self.learning_data_file, "r", encoding='utf-8') as f:
-            learning_data = json.load(f)
+        self.learning_log.refresh()
+        stats = self.content_stats_index.get(content_id or None)
 
-        df = pd.DataFrame(learning_data["learning_records"])
-        
-        if content_id:
-            df = df[df["content_id"] == content_id]
-
-        if df.empty:
+        if stats is None:
             return {
                 "status": "error",
                 "message": "Aucune donnée disponible"
             }
 
-        stats = {
-            "total_views": len(df),
-            "average_score": df["score"].mean(),
-            "completion_rate": df["completion_rate"].mean(),
-            "average_time_spent": df["time_spent"].mean(),
-            "success_rate_by_type": df.groupby("content_type")["success_rate"].mean().to_dict(),
-            "difficulty_distribution": df["difficulty_level"].value_counts().to_dict()
-        }
-
         return stats
 
+    def get_content_stats_many(self, content_ids=None):
+        """Obtient les statistiques de plusieurs contenus (tout le catalogue par défaut) en un seul appel"""
+        self.learning_log.refresh()
+        return self.content_stats_index.frame(content_ids)
+
     def _calculate_content_relevance(self, content, student_profile):
         """Calcule la pertinence du contenu pour l'étudiant"""
         score = 0.0
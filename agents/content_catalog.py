@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+
+
+class ContentCatalog:
+    """Catalogue de contenus chargé une seule fois, avec index inversés sous forme de bitmaps
+
+    Chaque valeur indexée (sujet, module, type, type de ressource, difficulté) est associée à un
+    entier dont le bit ``i`` indique que le contenu en position ``i`` possède cette valeur. Les
+    requêtes multi-critères se résument à des ET/OU binaires entre ces bitmaps.
+    """
+
+    INDEXED_FIELDS = ("subject", "module", "type", "resource_type", "difficulty")
+    # Clé de la liste des contenus dans le fichier JSON
+    ITEMS_KEY = "content_items"
+
+    def __init__(self, content_file):
+        self.content_file = Path(content_file)
+        self._lock = threading.RLock()
+        self._items = []
+        self._positions = {}
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+        self._alive = 0
+        self._mtime = None
+        self.version = 0
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return bin(self._alive).count("1")
+
+    def refresh(self):
+        """Recharge le catalogue s'il a changé sur disque, en ne réindexant que les contenus modifiés"""
+        with self._lock:
+            try:
+                mtime = os.stat(self.content_file).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if mtime == self._mtime:
+                return False
+
+            with open(self.content_file, "r", encoding='utf-8') as f:
+                items = json.load(f).get(self.ITEMS_KEY, [])
+            self._mtime = mtime
+            self._apply(self._deduplicate(items))
+            self.version += 1
+            return True
+
+    def _apply(self, items):
+        """Fusionne une nouvelle version du catalogue dans les index existants"""
+        if not self._positions:
+            self._rebuild(items)
+            return
+
+        seen = set()
+        for item in items:
+            key = self._item_key(item)
+            seen.add(key)
+            position = self._positions.get(key)
+            if position is None:
+                self._append(key, item)
+            elif self._items[position] != item:
+                self._unindex(position, self._items[position])
+                self._items[position] = item
+                self._index(position, item)
+
+        # Contenus supprimés du fichier
+        for key in [k for k in self._positions if k not in seen]:
+            position = self._positions.pop(key)
+            self._unindex(position, self._items[position])
+            self._items[position] = None
+            self._alive &= ~(1 << position)
+
+    def _rebuild(self, items):
+        """Construit tous les index en une passe (chargement initial)"""
+        self._items = list(items)
+        self._positions = {self._item_key(item): i for i, item in enumerate(self._items)}
+        positions_by_value = {field: {} for field in self.INDEXED_FIELDS}
+        for i, item in enumerate(self._items):
+            for field in self.INDEXED_FIELDS:
+                value = self._index_value(item, field)
+                if value is not None:
+                    positions_by_value[field].setdefault(value, []).append(i)
+
+        size = len(self._items)
+        self._alive = self._to_bitmap(range(size), size)
+        self._indexes = {
+            field: {value: self._to_bitmap(positions, size) for value, positions in values.items()}
+            for field, values in positions_by_value.items()
+        }
+
+    def _to_bitmap(self, positions, size):
+        """Convertit une liste de positions en bitmap"""
+        bits = np.zeros(size, dtype=bool)
+        bits[list(positions)] = True
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+    def _item_key(self, item):
+        """Identifiant du contenu, ou empreinte de son contenu s'il n'en a pas"""
+        item_id = item.get("id")
+        if item_id is not None:
+            return item_id
+        payload = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        return "__content_" + hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _deduplicate(self, items):
+        """Fusionne les contenus partageant une même clé (les dernières valeurs l'emportent)"""
+        merged = {}
+        for item in items:
+            key = self._item_key(item)
+            if key in merged:
+                print(f"Contenu en double dans le catalogue ({key}) : les entrées sont fusionnées")
+                merged[key] = dict(merged[key], **item)
+            else:
+                merged[key] = item
+        return list(merged.values())
+
+    def _append(self, key, item):
+        position = len(self._items)
+        self._items.append(item)
+        self._positions[key] = position
+        self._alive |= 1 << position
+        self._index(position, item)
+
+    def _index_value(self, item, field):
+        value = item.get(field)
+        if field == "difficulty":
+            try:
+                return int(round(float(value)))
+            except (TypeError, ValueError):
+                return None
+        return value if isinstance(value, str) and value else None
+
+    def _index(self, position, item):
+        bit = 1 << position
+        for field in self.INDEXED_FIELDS:
+            value = self._index_value(item, field)
+            if value is not None:
+                index = self._indexes[field]
+                index[value] = index.get(value, 0) | bit
+
+    def _unindex(self, position, item):
+        mask = ~(1 << position)
+        for field in self.INDEXED_FIELDS:
+            value = self._index_value(item, field)
+            if value is not None and value in self._indexes[field]:
+                remaining = self._indexes[field][value] & mask
+                if remaining:
+                    self._indexes[field][value] = remaining
+                else:
+                    del self._indexes[field][value]
+
+    def get(self, item_id):
+        """Retourne un contenu par son identifiant"""
+        with self._lock:
+            self.refresh()
+            position = self._positions.get(item_id)
+            return None if position is None else self._items[position]
+
+    def items(self):
+        """Tous les contenus du catalogue"""
+        with self._lock:
+            self.refresh()
+            return [item for item in self._items if item is not None]
+
+    def values(self, field):
+        """Valeurs distinctes d'un champ indexé"""
+        with self._lock:
+            self.refresh()
+            return list(self._indexes[field])
+
+    def query(self, limit=None, min_difficulty=None, max_difficulty=None, **criteria):
+        """Contenus correspondant à tous les critères (une valeur ou une liste de valeurs par champ)"""
+        with self._lock:
+            self.refresh()
+            bitmap = self._alive
+            for field, wanted in criteria.items():
+                if field not in self._indexes:
+                    raise ValueError(f"Champ non indexé: {field}")
+                if wanted is None:
+                    continue
+                values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                field_bitmap = 0
+                for value in values:
+                    field_bitmap |= self._indexes[field].get(value, 0)
+                bitmap &= field_bitmap
+
+            if min_difficulty is None and max_difficulty is None:
+                return [self._items[p] for p in self._bitmap_positions(bitmap, limit)]
+
+            # Les index regroupent les difficultés arrondies : les groupes pouvant contenir des
+            # valeurs de l'intervalle sont retenus, puis la difficulté exacte est vérifiée
+            low = float("-inf") if min_difficulty is None else min_difficulty
+            high = float("inf") if max_difficulty is None else max_difficulty
+            range_bitmap = 0
+            for value, value_bitmap in self._indexes["difficulty"].items():
+                if low - 0.5 <= value <= high + 0.5:
+                    range_bitmap |= value_bitmap
+            bitmap &= range_bitmap
+
+            matches = []
+            for p in self._bitmap_positions(bitmap):
+                if low <= float(self._items[p]["difficulty"]) <= high:
+                    matches.append(self._items[p])
+                    if limit is not None and len(matches) >= limit:
+                        break
+            return matches
+
+    def _bitmap_positions(self, bitmap, limit=None):
+        """Positions des bits à 1 d'un bitmap, dans l'ordre croissant"""
+        if bitmap == 0:
+            return []
+        raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+        positions = np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+        if limit is not None:
+            positions = positions[:limit]
+        return positions.tolist()
+
+    def add_items(self, items):
+        """Ajoute ou met à jour des contenus puis sauvegarde le catalogue"""
+        with self._lock:
+            self.refresh()
+            for item in items:
+                key = self._item_key(item)
+                position = self._positions.get(key)
+                if position is None:
+                    self._append(key, item)
+                else:
+                    self._unindex(position, self._items[position])
+                    self._items[position] = item
+                    self._index(position, item)
+            self.version += 1
+            self.save()
+
+    def save(self):
+        """Écrit le catalogue de manière atomique"""
+        with self._lock:
+            items = [item for item in self._items if item is not None]
+            tmp_file = self.content_file.with_suffix(self.content_file.suffix + ".tmp")
+            with open(tmp_file, "w", encoding='utf-8') as f:
+                json.dump({self.ITEMS_KEY: items}, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_file, self.content_file)
+            self._mtime = os.stat(self.content_file).st_mtime_ns
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_content_catalog(content_file):
+    """Retourne le catalogue partagé associé à un fichier de contenus"""
+    key = str(Path(content_file).resolve())
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = ContentCatalog(content_file)
+        return _catalogs[key]
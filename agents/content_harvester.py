@@ -0,0 +1,121 @@
+import hashlib
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# Paramètres de suivi sans incidence sur la ressource désignée
+TRACKING_PARAMS = {"fbclid", "gclid", "si", "feature", "ref", "source"}
+
+
+def canonicalize_url(url):
+    """Forme canonique d'une URL : https, hôte sans www, sans paramètres de suivi ni fragment"""
+    url = str(url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = re.sub(r"/+$", "", parts.path) or ""
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    ]
+
+    # Les différentes formes de liens YouTube désignent la même vidéo
+    if host == "youtu.be" and path:
+        query = [("v", path.lstrip("/"))] + [(k, v) for k, v in query if k != "v"]
+        host, path = "youtube.com", "/watch"
+    elif host == "youtube.com" and path.startswith(("/embed/", "/shorts/")):
+        query = [("v", path.split("/")[2])] + [(k, v) for k, v in query if k != "v"]
+        path = "/watch"
+    if host == "youtube.com" and path == "/watch":
+        query = [(k, v) for k, v in query if k in ("v", "list")]
+
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def is_allowed_domain(url, domains):
+    """Indique si l'hôte de l'URL appartient à l'un des domaines (sous-domaines compris)"""
+    host = urlsplit(canonicalize_url(url)).netloc
+    return bool(host) and any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def url_hash(url):
+    """Empreinte de l'URL canonique"""
+    return hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+class ContentHarvester:
+    """Fusionne dans le catalogue les recommandations LLM validées, dédupliquées par URL canonique"""
+
+    HARVESTED_FIELDS = (
+        "id", "title", "subject", "module", "type", "difficulty", "description", "objectives",
+        "duration", "resource_url", "resource_type", "additional_resources", "prerequisites", "next_steps"
+    )
+
+    def __init__(self, catalog, validator=None):
+        self.catalog = catalog
+        # Même règle de validation que celle appliquée aux recommandations servies
+        self.validator = validator
+        self._lock = threading.Lock()
+        self._url_index = {}
+        self._indexed_version = None
+
+    def _refresh_index(self):
+        """Reconstruit l'index empreinte d'URL → contenu si le catalogue a changé"""
+        self.catalog.refresh()
+        if self._indexed_version == self.catalog.version:
+            return
+        self._url_index = {
+            item.get("url_hash") or url_hash(item["resource_url"]): item.get("id")
+            for item in self.catalog.items() if item.get("resource_url")
+        }
+        self._indexed_version = self.catalog.version
+
+    def contains(self, url):
+        """Indique si une ressource est déjà présente dans le catalogue"""
+        with self._lock:
+            self._refresh_index()
+            return url_hash(url) in self._url_index
+
+    def harvest(self, recommendations, subject=None, module=None):
+        """Ajoute au catalogue les recommandations inédites et retourne les contenus ajoutés"""
+        with self._lock:
+            self._refresh_index()
+            new_items = []
+            for rec in recommendations:
+                url = rec.get("resource_url")
+                if not url or not self._is_valid(rec):
+                    continue
+                digest = url_hash(url)
+                if digest in self._url_index:
+                    continue
+
+                item = {field: rec[field] for field in self.HARVESTED_FIELDS if rec.get(field) is not None}
+                item.setdefault("subject", subject)
+                item.setdefault("module", module)
+                # Éviter d'écraser un contenu existant portant le même identifiant
+                if not item.get("id") or self.catalog.get(item["id"]) is not None or \
+                        any(i["id"] == item["id"] for i in new_items):
+                    item["id"] = f"LLM{digest[:10].upper()}"
+                item["url_hash"] = digest
+                item["source"] = "llm"
+                item["harvested_at"] = datetime.now().isoformat()
+
+                self._url_index[digest] = item["id"]
+                new_items.append(item)
+
+            if new_items:
+                self.catalog.add_items(new_items)
+                self._indexed_version = self.catalog.version
+            return new_items
+
+    def _is_valid(self, rec):
+        return self.validator is None or self.validator(rec)
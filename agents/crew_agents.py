@@ -1,9 +1,9 @@
+import threading
 from crewai import Agent
-import google.generativeai as genai
 from .student_agent import StudentAgent
 from .content_agent import ContentAgent
 from .tutor_agent import TutorAgent
-import os
+from .llm_gateway import get_llm_gateway, set_llm_gateway
 from dotenv import load_dotenv
 
 class AdaptiveLearningCrewAgents:
@@ -11,11 +11,8 @@ class AdaptiveLearningCrewAgents:
         # Charger les variables d'environnement
         load_dotenv()
         
-        # Configuration de Gemini
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        
-        # Initialiser le modèle Gemini
-        self.model = genai.GenerativeModel('gemini-pro')
+        # Passerelle LLM partagée (débit, concurrence, reprises, coalescence)
+        self.model = get_llm_gateway()
         
         # Initialiser les agents spécialisés
         self.student_manager = StudentAgent()
@@ -93,7 +90,7 @@ class AdaptiveLearningCrewAgents:
                 {
                     'name': 'provide_feedback',
                     'description': 'Provide personalized feedback',
-                    'func': self.tutor_manager.provide_feedback
+                    'func': self.tutor_manager.feedback_report
                 },
                 {
                     'name': 'identify_struggles',
@@ -109,3 +106,53 @@ class AdaptiveLearningCrewAgents:
             verbose=True,
             llm=self._create_llm_with_gemini()
         )
+
+
+_crew_agents = None
+_crew_agents_lock = threading.Lock()
+_reload_hooks = []
+
+
+def get_crew_agents():
+    """Retourne les agents partagés par tout le processus, créés au premier appel"""
+    global _crew_agents
+    if _crew_agents is None:
+        with _crew_agents_lock:
+            if _crew_agents is None:
+                _crew_agents = AdaptiveLearningCrewAgents()
+    return _crew_agents
+
+
+def add_reload_hook(callback):
+    """Enregistre une fonction appelée avec les nouveaux agents après chaque rechargement
+
+    Retourne une fonction qui désenregistre le hook.
+    """
+    with _crew_agents_lock:
+        _reload_hooks.append(callback)
+
+    def unregister():
+        with _crew_agents_lock:
+            if callback in _reload_hooks:
+                _reload_hooks.remove(callback)
+
+    return unregister
+
+
+def reload_crew_agents(reload_model=False):
+    """Recrée les agents partagés ; ``reload_model`` relit aussi la configuration du LLM (.env)"""
+    global _crew_agents
+    with _crew_agents_lock:
+        if reload_model:
+            load_dotenv(override=True)
+            set_llm_gateway(None)  # Recréée au prochain get_llm_gateway()
+        # Les agents ne possèdent pas de thread propre : index, rappels et caches sont partagés
+        _crew_agents = AdaptiveLearningCrewAgents()
+        agents, hooks = _crew_agents, list(_reload_hooks)
+
+    for hook in hooks:
+        try:
+            hook(agents)
+        except Exception as e:
+            print(f"Erreur lors du rechargement des agents: {str(e)}")
+    return agents
@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class CrewJobQueue:
+    """Exécution asynchrone des analyses de l'équipage d'agents dans un pool de threads borné
+
+    ``runner(student_id, subject, report)`` exécute l'analyse et retourne son résultat ;
+    ``report(name, value)`` publie un résultat partiel consultable pendant l'exécution.
+    Une soumission pour un (étudiant, sujet) déjà en cours rejoint le job existant. Les jobs
+    terminés restent consultables pendant ``ttl`` secondes.
+    """
+
+    def __init__(self, runner, max_workers=2, max_pending=20, ttl=3600, clock=time.time):
+        self.runner = runner
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._in_flight = {}
+        self._finished = deque()
+
+    def submit(self, student_id, subject=None):
+        """Soumet une analyse et retourne l'identifiant du job (None si la file est pleine)"""
+        key = (student_id, subject)
+        with self._lock:
+            self._purge()
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                return job_id
+            pending = sum(1 for job in self._jobs.values() if job["status"] == "pending")
+            if pending >= self.max_pending:
+                print("Erreur lors de la soumission de l'analyse: file de jobs pleine")
+                return None
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "student_id": student_id,
+                "subject": subject,
+                "status": "pending",
+                "partial_results": {},
+                "result": None,
+                "error": None,
+                "submitted_at": self.clock(),
+                "started_at": None,
+                "finished_at": None
+            }
+            self._in_flight[key] = job_id
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def status(self, job_id):
+        """État d'un job, avec ses résultats partiels ou son résultat final (None si inconnu ou expiré)"""
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job, partial_results=dict(job["partial_results"]))
+        for field in ("submitted_at", "started_at", "finished_at"):
+            if snapshot[field] is not None:
+                snapshot[field] = datetime.fromtimestamp(snapshot[field]).isoformat()
+        return snapshot
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = self.clock()
+
+        def report(name, value):
+            with self._lock:
+                job["partial_results"][name] = value
+
+        try:
+            result = self.runner(job["student_id"], job["subject"], report)
+            outcome = {"status": "done", "result": result}
+        except Exception as e:
+            print(f"Erreur lors de l'exécution de l'analyse {job_id}: {str(e)}")
+            outcome = {"status": "failed", "error": str(e)}
+
+        with self._lock:
+            job.update(outcome, finished_at=self.clock())
+            key = (job["student_id"], job["subject"])
+            if self._in_flight.get(key) == job_id:
+                del self._in_flight[key]
+            self._finished.append((job["finished_at"], job_id))
+
+    def _purge(self):
+        """Supprime les jobs terminés depuis plus de ``ttl`` secondes (dans l'ordre de fin)"""
+        limit = self.clock() - self.ttl
+        while self._finished and self._finished[0][0] < limit:
+            _, job_id = self._finished.popleft()
+            self._jobs.pop(job_id, None)
@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from .content_catalog import ContentCatalog
+
+
+class ExerciseBank(ContentCatalog):
+    """Banque d'exercices indexée par sujet, sous-thème, type d'exercice et difficulté"""
+
+    INDEXED_FIELDS = ("subject", "sub_topic", "exercise_type", "difficulty")
+    ITEMS_KEY = "exercises"
+    REQUIRED_FIELDS = ("title", "duration", "objective", "focus_points")
+    # Délai (secondes) avant de redemander au LLM une combinaison dont la génération a échoué
+    GENERATION_RETRY_DELAY = 600
+
+    def __init__(self, exercises_file):
+        super().__init__(exercises_file)
+        # Derniers échecs de génération par combinaison, partagés avec la banque par tout le processus
+        self._failed_generations = {}
+
+    def can_generate(self, combination, now=None):
+        """Indique si la génération de cette combinaison n'a pas échoué récemment"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return now - self._failed_generations.get(combination, float("-inf")) >= self.GENERATION_RETRY_DELAY
+
+    def record_generation(self, combination, succeeded, now=None):
+        """Mémorise l'échec d'une génération (erreur ou aucun exercice retenu), oublié après un succès"""
+        with self._lock:
+            if succeeded:
+                self._failed_generations.pop(combination, None)
+            else:
+                self._failed_generations[combination] = time.time() if now is None else now
+
+    def suggest(self, subject=None, sub_topic=None, exercise_type=None, difficulty=None, count=3, exclude=()):
+        """Exercices les plus adaptés : même type d'exercice si possible, difficulté la plus proche"""
+        low = high = None
+        if difficulty is not None:
+            low, high = difficulty - 1, difficulty + 1
+
+        candidates = []
+        seen = set(exclude)
+        for wanted_type in ([exercise_type, None] if exercise_type else [None]):
+            for exercise in self.query(subject=subject, sub_topic=sub_topic, exercise_type=wanted_type,
+                                       min_difficulty=low, max_difficulty=high):
+                if exercise.get("id") not in seen:
+                    seen.add(exercise.get("id"))
+                    candidates.append(exercise)
+            if len(candidates) >= count:
+                break
+
+        if difficulty is not None:
+            def distance(exercise):
+                value = self._index_value(exercise, "difficulty")
+                return abs(value - difficulty) if value is not None else 5
+            candidates.sort(key=lambda e: (e.get("exercise_type") != exercise_type, distance(e)))
+        return candidates[:count]
+
+    def is_valid(self, exercise):
+        """Vérifie qu'un exercice contient les champs attendus par l'interface"""
+        return (
+            isinstance(exercise, dict)
+            and all(exercise.get(field) not in (None, "", []) for field in self.REQUIRED_FIELDS)
+            and isinstance(exercise["focus_points"], list)
+        )
+
+    def add_generated(self, exercises, subject=None, sub_topic=None, exercise_type=None, difficulty=None):
+        """Ajoute à la banque des exercices générés et retourne ceux qui ont été retenus"""
+        accepted = []
+        for exercise in exercises:
+            if not self.is_valid(exercise):
+                continue
+            # La combinaison demandée fait foi : c'est elle que l'exercice doit couvrir dans la banque
+            exercise = dict(exercise, subject=subject, sub_topic=sub_topic)
+            if difficulty is not None:
+                exercise["difficulty"] = difficulty
+            if exercise_type is not None or not exercise.get("exercise_type"):
+                exercise["exercise_type"] = exercise_type
+            digest = hashlib.sha1(
+                f"{exercise['subject']}|{exercise['sub_topic']}|{exercise['title']}".lower().encode("utf-8")
+            ).hexdigest()
+            exercise["id"] = f"EXLLM{digest[:10].upper()}"
+            if self.get(exercise["id"]) is not None or any(e["id"] == exercise["id"] for e in accepted):
+                continue
+            exercise["source"] = "llm"
+            exercise["generated_at"] = datetime.now().isoformat()
+            accepted.append(exercise)
+
+        if accepted:
+            self.add_items(accepted)
+        return accepted
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_exercise_bank(exercises_file):
+    """Retourne la banque d'exercices partagée associée à un fichier"""
+    key = str(Path(exercises_file).resolve())
+    with _banks_lock:
+        if key not in _banks:
+            _banks[key] = ExerciseBank(exercises_file)
+        return _banks[key]
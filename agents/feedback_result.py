@@ -0,0 +1,75 @@
+import threading
+from collections.abc import Mapping
+from datetime import date
+import numpy as np
+
+
+def to_json_compatible(value):
+    """Convertit une valeur calculée (types NumPy / pandas, tuples, clés non textuelles) en types JSON"""
+    if isinstance(value, Mapping):
+        return {key if isinstance(key, str) else str(key): to_json_compatible(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        return [to_json_compatible(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, date):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class FeedbackResult(Mapping):
+    """Feedback dont chaque section n'est calculée qu'au premier accès, puis mémorisée
+
+    ``fields`` contient les valeurs déjà connues (horodatage, étudiant, contenu) et
+    ``builders`` associe à chaque section demandée une fonction sans argument qui la calcule.
+    ``values`` fournit des sections déjà connues et ``on_compute(section, value)`` est appelé
+    après chaque calcul effectif.
+    """
+
+    def __init__(self, fields, builders, values=None, on_compute=None):
+        self._fields = dict(fields)
+        self._builders = dict(builders)
+        self._values = {key: value for key, value in (values or {}).items() if key in self._builders}
+        self._on_compute = on_compute
+        self._lock = threading.RLock()
+
+    @property
+    def sections(self):
+        """Sections disponibles dans ce feedback"""
+        return list(self._builders)
+
+    def is_computed(self, section):
+        """Indique si une section a déjà été calculée"""
+        return section in self._values
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return self._fields[key]
+        if key not in self._builders:
+            raise KeyError(key)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._builders[key]()
+                if self._on_compute is not None:
+                    self._on_compute(key, self._values[key])
+            return self._values[key]
+
+    def __iter__(self):
+        yield from self._fields
+        yield from self._builders
+
+    def __len__(self):
+        return len(self._fields) + len(self._builders)
+
+    def __contains__(self, key):
+        return key in self._fields or key in self._builders
+
+    def to_dict(self):
+        """Calcule toutes les sections et retourne un dictionnaire sérialisable en JSON"""
+        return to_json_compatible({key: self[key] for key in self})
+
+    def __repr__(self):
+        computed = [section for section in self._builders if section in self._values]
+        return f"FeedbackResult(student_id={self._fields.get('student_id')!r}, sections={self.sections!r}, computed={computed!r})"
@@ -0,0 +1,209 @@
+import copy
+import heapq
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+def _encode(value):
+    """Forme JSON canonique d'une section : les types sans équivalent JSON sont étiquetés
+
+    Les clés non textuelles, tuples, dates, intervalles et durées sont conservés sous une forme
+    étiquetée que ``_decode`` reconstruit à la lecture ; les scalaires NumPy deviennent des
+    scalaires Python.
+    """
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {"__dict__": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, (list, np.ndarray)):
+        return [_encode(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return {"__timestamp__": value.isoformat()}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, pd.Interval):
+        return {"__interval__": [_encode(value.left), _encode(value.right), value.closed]}
+    if isinstance(value, pd.Timedelta):
+        return {"__timedelta__": int(value.value)}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+_DECODERS = {
+    "__dict__": lambda items: {key: item for key, item in items},
+    "__tuple__": tuple,
+    "__timestamp__": pd.Timestamp,
+    "__datetime__": datetime.fromisoformat,
+    "__interval__": lambda args: pd.Interval(args[0], args[1], closed=args[2]),
+    "__timedelta__": pd.Timedelta
+}
+
+
+def _decode(obj):
+    """Reconstruit les valeurs étiquetées par ``_encode`` (object_hook de json.loads)"""
+    if len(obj) == 1:
+        tag, value = next(iter(obj.items()))
+        if tag in _DECODERS:
+            return _DECODERS[tag](value)
+    return obj
+
+
+class FeedbackStore:
+    """Historique des feedbacks en ajout seul (JSON Lines), indexé par étudiant
+
+    Chaque ligne contient les sections calculées pour un étudiant (et éventuellement un contenu)
+    ainsi que la version des données d'apprentissage dont elles sont issues. Les sections
+    calculées pour une même version sont fusionnées, ce qui permet de les réutiliser tant que
+    les données de l'étudiant n'ont pas changé.
+    """
+
+    def __init__(self, history_file):
+        self.history_file = Path(history_file)
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._history = {}
+        self._merged = {}
+        self._latest_key = {}
+
+    def refresh(self):
+        """Lit les lignes ajoutées depuis la dernière lecture (y compris par d'autres processus)"""
+        with self._lock:
+            try:
+                size = os.stat(self.history_file).st_size
+            except FileNotFoundError:
+                return False
+            if size < self._offset:
+                # Fichier tronqué ou remplacé : tout relire
+                self._reset()
+            if size == self._offset:
+                return False
+
+            with open(self.history_file, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            # Ignorer une éventuelle ligne en cours d'écriture
+            complete = data[:data.rfind(b"\n") + 1]
+            self._offset += len(complete)
+            for line in complete.splitlines():
+                if line.strip():
+                    try:
+                        self._index(json.loads(line, object_hook=_decode))
+                    except json.JSONDecodeError as e:
+                        print(f"Erreur de lecture de l'historique des feedbacks: {str(e)}")
+            return True
+
+    def _index(self, entry):
+        student_id = entry.get("student_id")
+        key = (student_id, entry.get("content_id"))
+        self._history.setdefault(student_id, []).append(entry)
+
+        merged = self._merged.get(key)
+        if merged is None or merged["data_version"] != entry.get("data_version"):
+            merged = self._merged[key] = {
+                "student_id": student_id,
+                "content_id": entry.get("content_id"),
+                "data_version": entry.get("data_version"),
+                "timestamp": entry.get("timestamp"),
+                "sections": {}
+            }
+        merged["sections"].update(entry.get("sections", {}))
+        merged["timestamp"] = entry.get("timestamp")
+        self._latest_key[student_id] = key
+
+    def append(self, student_id, content_id, data_version, sections, timestamp=None):
+        """Ajoute des sections de feedback à l'historique"""
+        entry = {
+            "student_id": student_id,
+            "content_id": content_id,
+            "data_version": data_version,
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "sections": _encode(sections)
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self.refresh()
+            fd = os.open(self.history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self._offset += len(line)
+            # Relire l'entrée sérialisée pour que l'index contienne exactement ce qui est stocké
+            self._index(json.loads(line, object_hook=_decode))
+        return entry
+
+    def lookup(self, student_id, content_id=None, data_version=None):
+        """Dernier feedback fusionné d'un étudiant, ou None si absent ou calculé sur d'autres données"""
+        with self._lock:
+            self.refresh()
+            merged = self._merged.get((student_id, content_id))
+            if merged is None or (data_version is not None and merged["data_version"] != data_version):
+                return None
+            return self._copy(merged)
+
+    def history(self, student_id):
+        """Toutes les entrées d'un étudiant, dans l'ordre chronologique"""
+        with self._lock:
+            self.refresh()
+            return copy.deepcopy(self._history.get(student_id, []))
+
+    def latest_for_students(self, student_ids=None, limit=None):
+        """Dernier feedback de chaque étudiant demandé (ou des ``limit`` étudiants les plus récents)"""
+        with self._lock:
+            self.refresh()
+            if student_ids is None:
+                keys = self._latest_key.values()
+                if limit is not None:
+                    keys = heapq.nlargest(limit, keys, key=lambda k: self._merged[k]["timestamp"] or "")
+                return {key[0]: self._copy(self._merged[key]) for key in keys}
+            return {
+                student_id: self._copy(self._merged[self._latest_key[student_id]])
+                for student_id in student_ids if student_id in self._latest_key
+            }
+
+    def _copy(self, merged):
+        # Copie profonde : les sections de l'index ne doivent pas être modifiées par les appelants
+        return copy.deepcopy(merged)
+
+    def import_legacy(self, legacy_file):
+        """Reprend les feedbacks de l'ancien fichier JSON (``feedback_records``) puis le renomme"""
+        legacy_file = Path(legacy_file)
+        if not legacy_file.exists():
+            return 0
+        try:
+            with open(legacy_file, "r", encoding='utf-8') as f:
+                records = json.load(f).get("feedback_records", [])
+            for record in records:
+                sections = {k: v for k, v in record.items() if k not in ("student_id", "content_id", "timestamp")}
+                self.append(record.get("student_id"), record.get("content_id"), None, sections, record.get("timestamp"))
+            legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+            return len(records)
+        except Exception as e:
+            print(f"Erreur lors de la reprise de l'ancien historique des feedbacks: {str(e)}")
+            return 0
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_feedback_store(history_file):
+    """Retourne l'historique partagé associé à un fichier"""
+    key = str(Path(history_file).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = FeedbackStore(history_file)
+        return _stores[key]
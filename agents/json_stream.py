@@ -0,0 +1,78 @@
+import json
+
+
+class IncrementalJSONArrayParser:
+    """Parse un tableau JSON reçu par morceaux et restitue chaque objet dès qu'il est fermé"""
+
+    def __init__(self):
+        self._in_array = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._current = []
+
+    @property
+    def finished(self):
+        """Indique si le tableau de premier niveau a été entièrement lu"""
+        return self._finished
+
+    def feed(self, chunk):
+        """Consomme un morceau de texte et retourne la liste des objets complétés"""
+        completed = []
+        if self._finished or not chunk:
+            return completed
+
+        for char in chunk:
+            if not self._in_array:
+                # Ignorer tout ce qui précède le tableau (texte libre, balises markdown...)
+                if char == '[':
+                    self._in_array = True
+                    self._depth = 1
+                continue
+
+            if self._depth > 1:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 1:
+                    if char != '{':
+                        # Élément non objet : ignoré jusqu'à sa fermeture
+                        self._current = []
+                    else:
+                        self._current = [char]
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 1:
+                    obj = self._decode(''.join(self._current))
+                    if obj is not None:
+                        completed.append(obj)
+                    self._current = []
+                elif self._depth == 0:
+                    self._finished = True
+                    break
+
+        return completed
+
+    def _decode(self, text):
+        """Décode un objet JSON complet, ou None s'il est invalide"""
+        if not text.startswith('{'):
+            return None
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError as e:
+            print(f"Objet JSON invalide ignoré: {str(e)}")
+            return None
+        return obj if isinstance(obj, dict) else None
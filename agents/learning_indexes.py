@@ -0,0 +1,265 @@
+import math
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+def _number(value):
+    """Retourne la valeur numérique d'un champ, ou None si absente ou invalide"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+class ContentStatsIndex:
+    """Agrégats par contenu maintenus à l'arrivée de chaque enregistrement"""
+
+    FIELDS = ("score", "completion_rate", "time_spent")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._by_content = {}
+            self._global = self._empty_aggregate()
+
+    def _empty_aggregate(self):
+        return {
+            "views": 0,
+            "sums": {field: 0.0 for field in self.FIELDS},
+            "counts": {field: 0 for field in self.FIELDS},
+            "success_by_type": {},
+            "difficulty_histogram": {}
+        }
+
+    def ingest(self, record):
+        with self._lock:
+            self._add(self._global, record)
+            content_id = record.get("content_id")
+            if content_id is not None:
+                if content_id not in self._by_content:
+                    self._by_content[content_id] = self._empty_aggregate()
+                self._add(self._by_content[content_id], record)
+
+    def _add(self, aggregate, record):
+        aggregate["views"] += 1
+        for field in self.FIELDS:
+            value = _number(record.get(field))
+            if value is not None:
+                aggregate["sums"][field] += value
+                aggregate["counts"][field] += 1
+
+        content_type = record.get("content_type")
+        if content_type is not None:
+            success = aggregate["success_by_type"].setdefault(content_type, [0.0, 0])
+            value = _number(record.get("success_rate"))
+            if value is not None:
+                success[0] += value
+                success[1] += 1
+
+        difficulty = record.get("difficulty_level")
+        if _number(difficulty) is not None:
+            histogram = aggregate["difficulty_histogram"]
+            histogram[difficulty] = histogram.get(difficulty, 0) + 1
+
+    def get(self, content_id=None):
+        """Statistiques d'un contenu (ou globales), ou None s'il n'a aucune donnée"""
+        with self._lock:
+            aggregate = self._global if content_id is None else self._by_content.get(content_id)
+            if aggregate is None or aggregate["views"] == 0:
+                return None
+            return self._to_stats(aggregate)
+
+    def content_ids(self):
+        with self._lock:
+            return list(self._by_content)
+
+    def _to_stats(self, aggregate):
+        def mean(field):
+            count = aggregate["counts"][field]
+            return aggregate["sums"][field] / count if count else float("nan")
+
+        histogram = aggregate["difficulty_histogram"]
+        return {
+            "total_views": aggregate["views"],
+            "average_score": mean("score"),
+            "completion_rate": mean("completion_rate"),
+            "average_time_spent": mean("time_spent"),
+            "success_rate_by_type": {
+                content_type: (total / count if count else float("nan"))
+                for content_type, (total, count) in aggregate["success_by_type"].items()
+            },
+            "difficulty_distribution": dict(sorted(histogram.items(), key=lambda item: -item[1]))
+        }
+
+    def frame(self, content_ids=None):
+        """Statistiques de plusieurs contenus (tout le catalogue par défaut) sous forme de DataFrame"""
+        with self._lock:
+            ids = list(self._by_content) if content_ids is None else list(content_ids)
+            rows = {
+                content_id: self._to_stats(self._by_content[content_id])
+                for content_id in ids if content_id in self._by_content
+            }
+
+        columns = ["total_views", "average_score", "completion_rate", "average_time_spent",
+                   "success_rate_by_type", "difficulty_distribution"]
+        df = pd.DataFrame.from_dict(rows, orient="index", columns=columns).reindex(ids)
+        df["total_views"] = df["total_views"].fillna(0).astype(int)
+        df.index.name = "content_id"
+        return df
+
+
+class StudentContentIndex:
+    """Agrégats de score par couple (étudiant, contenu) pour des consultations en O(1)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pairs = {}
+            self._by_student = {}
+
+    def ingest(self, record):
+        content_id = record.get("content_id")
+        if content_id is None:
+            return
+        student_id = record.get("student_id")
+        key = (student_id, content_id)
+        with self._lock:
+            aggregate = self._pairs.get(key)
+            if aggregate is None:
+                # [somme des scores, nombre de scores, nombre d'enregistrements]
+                aggregate = self._pairs[key] = [0.0, 0, 0]
+                self._by_student.setdefault(student_id, {})[content_id] = aggregate
+            aggregate[2] += 1
+            score = _number(record.get("score"))
+            if score is not None:
+                aggregate[0] += score
+                aggregate[1] += 1
+
+    def average_score(self, student_id, content_id):
+        """Score moyen d'un étudiant sur un contenu, NaN sans score, None sans enregistrement"""
+        with self._lock:
+            aggregate = self._pairs.get((student_id, content_id))
+            if aggregate is None:
+                return None
+            return aggregate[0] / aggregate[1] if aggregate[1] else float("nan")
+
+    def student_averages(self, student_id):
+        """Scores moyens de l'étudiant pour chaque contenu consulté"""
+        with self._lock:
+            return {
+                content_id: (aggregate[0] / aggregate[1] if aggregate[1] else float("nan"))
+                for content_id, aggregate in self._by_student.get(student_id, {}).items()
+            }
+
+
+class StudentTimeIndex:
+    """Matrice jour × heure (7 × 24) des sommes et nombres de scores de chaque étudiant
+
+    Les jours sont numérotés de 0 (lundi) à 6 (dimanche), comme ``datetime.weekday()``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._matrices = {}
+            self._subjects = {}
+
+    def _slot(self, timestamp):
+        if timestamp is None:
+            return None
+        try:
+            moment = datetime.fromisoformat(str(timestamp))
+        except ValueError:
+            try:
+                moment = pd.Timestamp(timestamp)
+            except (TypeError, ValueError):
+                return None
+        return moment.weekday(), moment.hour
+
+    def ingest(self, record):
+        score = _number(record.get("score"))
+        slot = self._slot(record.get("timestamp"))
+        if score is None or slot is None:
+            return
+        day, hour = slot
+        student_id = record.get("student_id")
+        with self._lock:
+            matrix = self._matrices.get(student_id)
+            if matrix is None:
+                matrix = self._matrices[student_id] = (np.zeros((7, 24)), np.zeros((7, 24), dtype=np.int64))
+            matrix[0][day, hour] += score
+            matrix[1][day, hour] += 1
+
+            subject = record.get("subject")
+            if subject is not None:
+                by_subject = self._subjects.setdefault(student_id, {}).setdefault(day, {})
+                total = by_subject.setdefault(subject, [0.0, 0])
+                total[0] += score
+                total[1] += 1
+
+    def matrix(self, student_id):
+        """Copie des matrices (sommes, nombres) de l'étudiant, ou None sans données"""
+        with self._lock:
+            matrix = self._matrices.get(student_id)
+            return None if matrix is None else (matrix[0].copy(), matrix[1].copy())
+
+    def _top(self, sums, counts, k):
+        """Indices des k meilleures moyennes (ordre croissant d'indice en cas d'égalité)"""
+        means = np.divide(sums, counts, out=np.full(len(sums), -np.inf), where=counts > 0)
+        # Arrondi pour que les égalités ne dépendent pas de l'ordre de sommation
+        means = np.round(means, 12)
+        order = np.argsort(-means, kind='stable')
+        return [int(i) for i in order[:min(k, int(np.count_nonzero(counts)))]]
+
+    def best_hours(self, student_id, k=3, day=None):
+        """Heures de meilleur score moyen, sur toute la semaine ou pour un jour donné"""
+        with self._lock:
+            matrix = self._matrices.get(student_id)
+            if matrix is None:
+                return []
+            sums, counts = matrix
+            if day is None:
+                return self._top(sums.sum(axis=0), counts.sum(axis=0), k)
+            return self._top(sums[day], counts[day], k)
+
+    def best_days(self, student_id, k=4):
+        """Jours de meilleur score moyen"""
+        with self._lock:
+            matrix = self._matrices.get(student_id)
+            if matrix is None:
+                return []
+            return self._top(matrix[0].sum(axis=1), matrix[1].sum(axis=1), k)
+
+    def best_slots(self, student_id, k=10):
+        """Créneaux (jour, heure) de meilleur score moyen"""
+        with self._lock:
+            matrix = self._matrices.get(student_id)
+            if matrix is None:
+                return []
+            return [divmod(slot, 24) for slot in self._top(matrix[0].ravel(), matrix[1].ravel(), k)]
+
+    def students(self):
+        with self._lock:
+            return list(self._matrices)
+
+    def best_subject(self, student_id, day):
+        """Sujet de meilleur score moyen pour un jour donné, ou None"""
+        with self._lock:
+            by_subject = self._subjects.get(student_id, {}).get(day)
+            if not by_subject:
+                return None
+            return max(sorted(by_subject, key=str), key=lambda subject: round(by_subject[subject][0] / by_subject[subject][1], 12))
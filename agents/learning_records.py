@@ -0,0 +1,235 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class LearningRecordLog:
+    """Journal partagé des enregistrements d'apprentissage, diffusé de manière incrémentale aux index abonnés
+
+    Les index abonnés implémentent ``ingest(record)`` (appelé une fois par nouvel enregistrement)
+    et ``reset()`` (appelé si le fichier a été réécrit autrement que par ajout).
+    """
+
+    def __init__(self, learning_data_file):
+        self.learning_data_file = Path(learning_data_file)
+        self.lock = threading.RLock()
+        self._records = []
+        self._by_student = {}
+        # Empreinte cumulée des enregistrements de chaque étudiant (stable d'un processus à l'autre)
+        self._student_digests = {}
+        self._consumers = []
+        self._shared = {}
+        self._mtime = None
+        self._generation = 0
+
+    @property
+    def generation(self):
+        """Numéro incrémenté à chaque réécriture complète du fichier"""
+        return self._generation
+
+    def subscribe(self, consumer, start=0):
+        """Abonne un index et lui fournit les enregistrements existants à partir de ``start``"""
+        with self.lock:
+            self.refresh()
+            self._consumers.append(consumer)
+            for record in self._records[start:]:
+                consumer.ingest(record)
+        return consumer
+
+    def shared_index(self, name, factory):
+        """Index partagé par tous les agents du processus, créé et abonné au premier appel"""
+        with self.lock:
+            if name not in self._shared:
+                self._shared[name] = self.subscribe(factory())
+            return self._shared[name]
+
+    def unsubscribe(self, consumer):
+        """Désabonne un index, qui ne reçoit plus les nouveaux enregistrements"""
+        with self.lock:
+            self._consumers = [c for c in self._consumers if c is not consumer]
+            self._shared = {name: c for name, c in self._shared.items() if c is not consumer}
+
+    def refresh(self):
+        """Recharge le fichier s'il a changé et ne diffuse que les nouveaux enregistrements"""
+        with self.lock:
+            try:
+                mtime = os.stat(self.learning_data_file).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if mtime == self._mtime:
+                return False
+
+            with open(self.learning_data_file, "r", encoding='utf-8') as f:
+                records = json.load(f).get("learning_records", [])
+            self._mtime = mtime
+
+            # Un ajout laisse intacts tous les enregistrements déjà connus
+            known = len(self._records)
+            appended = len(records) >= known and records[:known] == self._records
+            if appended:
+                new_records = records[known:]
+            else:
+                # Fichier réécrit : reconstruire tous les index
+                self._generation += 1
+                self._by_student = {}
+                self._student_digests = {}
+                for consumer in self._consumers:
+                    consumer.reset()
+                new_records = records
+
+            self._records = records
+            for record in new_records:
+                student_id = record.get("student_id")
+                self._by_student.setdefault(student_id, []).append(record)
+                digest = self._student_digests.get(student_id)
+                if digest is None:
+                    digest = self._student_digests[student_id] = hashlib.sha1()
+                digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+                digest.update(b"\n")
+                for consumer in self._consumers:
+                    consumer.ingest(record)
+            return True
+
+    def records(self):
+        """Retourne tous les enregistrements"""
+        with self.lock:
+            self.refresh()
+            return list(self._records)
+
+    def student_records(self, student_id):
+        """Retourne les enregistrements d'un étudiant sans parcourir tout le journal"""
+        with self.lock:
+            self.refresh()
+            return list(self._by_student.get(student_id, []))
+
+    def student_version(self, student_id):
+        """Version des données d'un étudiant : empreinte de ses enregistrements
+
+        Elle change dès qu'un enregistrement le concernant est ajouté ou modifié, et reste la
+        même après un redémarrage tant que ses données sont identiques.
+        """
+        with self.lock:
+            self.refresh()
+            records = self._by_student.get(student_id, [])
+            digest = self._student_digests.get(student_id)
+            return f"{len(records)}:{digest.hexdigest() if digest is not None else ''}"
+
+
+class LearningRecordWriter:
+    """File d'écriture des enregistrements d'apprentissage, vidée par lots par un thread d'arrière-plan
+
+    Les appelants ne paient que le coût d'un ajout en mémoire ; le fichier est réécrit
+    (atomiquement) une seule fois par lot, par un unique écrivain par fichier.
+    """
+
+    def __init__(self, learning_data_file, flush_interval=0.5, max_batch=500):
+        self.learning_data_file = Path(learning_data_file)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._pending_keys = set()
+        self._thread = None
+        self.batches_written = 0
+        self.records_written = 0
+        atexit.register(self.flush)
+
+    def enqueue(self, record, key=None):
+        """Ajoute un enregistrement à la file ; ignoré si un enregistrement de même clé est en attente"""
+        with self._condition:
+            if key is not None:
+                if key in self._pending_keys:
+                    return False
+                self._pending_keys.add(key)
+            self._pending.append((key, record))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return True
+
+    def is_pending(self, key):
+        """Indique si un enregistrement de cette clé n'a pas encore été écrit"""
+        with self._condition:
+            return key in self._pending_keys
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # Laisser le lot se remplir pendant flush_interval, sauf s'il est déjà plein
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            self.flush()
+
+    def flush(self):
+        """Écrit immédiatement les enregistrements en attente et retourne leur nombre"""
+        with self._write_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            try:
+                self._append([record for _, record in batch])
+            except Exception as e:
+                print(f"Erreur lors de l'écriture des enregistrements d'apprentissage: {str(e)}")
+                with self._condition:
+                    self._pending = batch + self._pending
+                return 0
+
+            with self._condition:
+                self._pending_keys.difference_update(key for key, _ in batch if key is not None)
+                self.batches_written += 1
+                self.records_written += len(batch)
+            return len(batch)
+
+    def _append(self, records):
+        try:
+            with open(self.learning_data_file, "r", encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {"learning_records": []}
+        data.setdefault("learning_records", []).extend(records)
+
+        tmp_file = self.learning_data_file.with_suffix(self.learning_data_file.suffix + ".tmp")
+        with open(tmp_file, "w", encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, self.learning_data_file)
+
+
+_logs = {}
+_writers = {}
+_logs_lock = threading.Lock()
+
+
+def get_learning_log(learning_data_file):
+    """Retourne le journal partagé associé à un fichier de données d'apprentissage"""
+    key = str(Path(learning_data_file).resolve())
+    with _logs_lock:
+        if key not in _logs:
+            _logs[key] = LearningRecordLog(learning_data_file)
+        return _logs[key]
+
+
+def get_learning_record_writer(learning_data_file):
+    """Retourne l'écrivain partagé associé à un fichier de données d'apprentissage"""
+    key = str(Path(learning_data_file).resolve())
+    with _logs_lock:
+        if key not in _writers:
+            _writers[key] = LearningRecordWriter(learning_data_file)
+        return _writers[key]
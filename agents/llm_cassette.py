@@ -0,0 +1,140 @@
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from .llm_gateway import LLMResponse
+
+
+class CassetteMissError(KeyError):
+    """Aucune réponse enregistrée pour ce prompt et cette configuration"""
+
+
+def interaction_key(prompt, generation_config=None):
+    """Clé d'une interaction : prompt et configuration de génération"""
+    payload = json.dumps({"prompt": prompt, "generation_config": generation_config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_cassette(path):
+    """Charge les interactions d'une cassette (liste vide si le fichier n'existe pas)"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "r", encoding='utf-8') as f:
+        return json.load(f).get("interactions", [])
+
+
+class RecordingBackend:
+    """Enregistre chaque prompt, configuration, réponse et latence d'un backend réel dans une cassette"""
+
+    def __init__(self, backend, cassette_path):
+        self.backend = backend
+        self.cassette_path = Path(cassette_path)
+        self.interactions = load_cassette(self.cassette_path)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False, **kwargs):
+        if generation_config is not None:
+            kwargs["generation_config"] = generation_config
+        if safety_settings is not None:
+            kwargs["safety_settings"] = safety_settings
+
+        started = time.perf_counter()
+        if not stream:
+            response = self.backend.generate_content(prompt, **kwargs)
+            self._record(prompt, generation_config, safety_settings, response.text, started, stream=False)
+            return response
+
+        response = self.backend.generate_content(prompt, stream=True, **kwargs)
+
+        def chunks():
+            parts = []
+            for chunk in response:
+                parts.append(chunk.text)
+                yield chunk
+            self._record(prompt, generation_config, safety_settings, ''.join(parts), started, stream=True)
+
+        return chunks()
+
+    def _record(self, prompt, generation_config, safety_settings, text, started, stream):
+        """Ajoute une interaction à la cassette et la sauvegarde"""
+        interaction = {
+            "key": interaction_key(prompt, generation_config),
+            "prompt": prompt,
+            "generation_config": generation_config,
+            "safety_settings": safety_settings,
+            "stream": stream,
+            "response_text": text,
+            "latency": time.perf_counter() - started,
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+            self.save()
+
+    def save(self):
+        """Écrit la cassette de manière atomique"""
+        self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cassette_path.with_suffix(self.cassette_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump({"interactions": self.interactions}, f, indent=4, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.cassette_path)
+
+
+class ReplayBackend:
+    """Rejoue une cassette via la même interface que genai.GenerativeModel, sans réseau"""
+
+    LATENCY_MODES = ("none", "recorded", "lognormal")
+
+    def __init__(self, cassette_path, latency="none", latency_scale=1.0, seed=None, chunk_size=40):
+        if latency not in self.LATENCY_MODES:
+            raise ValueError(f"Mode de latence inconnu: {latency}")
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._positions = defaultdict(int)
+        self._by_key = defaultdict(list)
+
+        interactions = load_cassette(cassette_path)
+        for interaction in interactions:
+            self._by_key[interaction["key"]].append(interaction)
+
+        # Distribution log-normale ajustée sur les latences enregistrées
+        logs = [math.log(i["latency"]) for i in interactions if i.get("latency", 0) > 0]
+        self._has_latencies = bool(logs)
+        self._log_mean = sum(logs) / len(logs) if logs else 0.0
+        self._log_std = math.sqrt(sum((x - self._log_mean) ** 2 for x in logs) / len(logs)) if logs else 0.0
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False, **kwargs):
+        key = interaction_key(prompt, generation_config)
+        with self._lock:
+            candidates = self._by_key.get(key)
+            if not candidates:
+                raise CassetteMissError(f"Aucune réponse enregistrée pour la clé {key[:12]}")
+            # Les réponses d'un même prompt sont servies dans l'ordre d'enregistrement, en boucle
+            interaction = candidates[self._positions[key] % len(candidates)]
+            self._positions[key] += 1
+            delay = self._sample_latency(interaction)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        text = interaction["response_text"]
+        if stream:
+            return [LLMResponse(text[i:i + self.chunk_size]) for i in range(0, len(text), self.chunk_size)]
+        return LLMResponse(text)
+
+    def _sample_latency(self, interaction):
+        """Latence simulée selon le mode choisi"""
+        if self.latency == "recorded":
+            return interaction.get("latency", 0.0) * self.latency_scale
+        if self.latency == "lognormal" and self._has_latencies:
+            return self._random.lognormvariate(self._log_mean, self._log_std) * self.latency_scale
+        return 0.0
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+# Erreurs de l'API Gemini (google.api_core) pour lesquelles une nouvelle tentative a un sens
+RETRYABLE_ERRORS = (
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "RetryableBackendError"
+)
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class LLMGatewayError(Exception):
+    """Erreur levée lorsque la passerelle LLM ne peut pas satisfaire une requête"""
+
+
+class RetryableBackendError(Exception):
+    """Erreur transitoire simulée par le backend local"""
+
+
+class LLMResponse:
+    """Réponse minimale compatible avec celle de genai.GenerativeModel"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        yield self
+
+
+class TokenBucket:
+    """Limiteur de débit à seau de jetons, partagé entre les threads"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Consomme des jetons si disponibles, sans attendre"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Attend que des jetons soient disponibles puis les consomme"""
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate if self.rate > 0 else 0.1
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self.sleep(wait)
+
+
+class FakeBackend:
+    """Backend local sans réseau, pour tester la passerelle hors ligne"""
+
+    def __init__(self, responder=None, latency=0.0, failures=0, chunk_size=40):
+        self.responder = responder or (lambda prompt: "[]")
+        self.latency = latency
+        self.failures = failures
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            should_fail = self.failures > 0
+            if should_fail:
+                self.failures -= 1
+        if self.latency:
+            time.sleep(self.latency)
+        if should_fail:
+            raise RetryableBackendError("Quota simulé dépassé")
+
+        text = self.responder(prompt)
+        if stream:
+            return [LLMResponse(text[i:i + self.chunk_size]) for i in range(0, len(text), self.chunk_size)]
+        return LLMResponse(text)
+
+
+class GeminiBackend:
+    """Backend Gemini : un seul client GenerativeModel réutilisé par tous les appels"""
+
+    def __init__(self, model_name='gemini-pro'):
+        import google.generativeai as genai
+
+        load_dotenv()
+        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, prompt, **kwargs):
+        return self.model.generate_content(prompt, **kwargs)
+
+
+class LLMGateway:
+    """Passerelle partagée par tous les appels LLM : débit, concurrence, reprises et coalescence
+
+    ``clock``, ``sleep`` et ``rng`` (source du délai aléatoire) peuvent être remplacés pour les tests.
+    """
+
+    def __init__(self, backend, rate_per_second=2.0, burst=5, max_in_flight=4,
+                 max_retries=3, base_delay=0.5, max_delay=8.0, acquire_timeout=60.0,
+                 clock=time.monotonic, sleep=time.sleep, rng=None):
+        self.backend = backend
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.bucket = TokenBucket(rate_per_second, burst, clock=clock, sleep=sleep)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._stats = {
+            "requests": 0,
+            "upstream_calls": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "failures": 0
+        }
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Même interface que genai.GenerativeModel.generate_content"""
+        if stream:
+            return self._stream(prompt, kwargs)
+
+        key = self._request_key(prompt, kwargs)
+        with self._lock:
+            self._stats["requests"] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+
+        # Une requête identique est déjà en cours : attendre son résultat
+        if not leader:
+            return future.result()
+
+        try:
+            response = self._call_with_retry(prompt, kwargs)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        """Retourne les compteurs d'activité de la passerelle"""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._in_flight))
+
+    def _request_key(self, prompt, kwargs):
+        """Clé identifiant les requêtes identiques (prompt et configuration)"""
+        payload = json.dumps({"prompt": prompt, "config": kwargs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _acquire(self):
+        """Attend un jeton de débit puis un emplacement de concurrence"""
+        if not self.bucket.acquire(timeout=self.acquire_timeout):
+            raise LLMGatewayError("Limite de débit LLM atteinte")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise LLMGatewayError("Trop de requêtes LLM simultanées")
+
+    def _call_with_retry(self, prompt, kwargs):
+        """Appelle le backend en réessayant les erreurs transitoires avec un délai aléatoire"""
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            try:
+                with self._lock:
+                    self._stats["upstream_calls"] += 1
+                return self.backend.generate_content(prompt, **kwargs)
+            except Exception as e:
+                self._retry_or_raise(e, attempt)
+            finally:
+                self._slots.release()
+            self._backoff(attempt)
+
+    def _stream(self, prompt, kwargs):
+        """Réponse en flux, démarrée à la première itération
+
+        L'emplacement de concurrence n'est pris qu'à ce moment et reste occupé jusqu'à la fin ou
+        la fermeture du flux. Les erreurs transitoires survenues avant le premier fragment sont
+        réessayées ; une erreur en cours de flux est transmise au consommateur, les fragments
+        déjà produits ne pouvant pas être repris.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            started = False
+            try:
+                with self._lock:
+                    self._stats["upstream_calls"] += 1
+                for chunk in self.backend.generate_content(prompt, stream=True, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise
+                self._retry_or_raise(e, attempt)
+            finally:
+                self._slots.release()
+            self._backoff(attempt)
+
+    def _retry_or_raise(self, error, attempt):
+        """Propage l'erreur si elle est définitive, sinon compte une nouvelle tentative"""
+        if attempt >= self.max_retries or not self._is_retryable(error):
+            with self._lock:
+                self._stats["failures"] += 1
+            raise error
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def _backoff(self, attempt):
+        # Backoff exponentiel avec gigue complète
+        self.sleep(self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt))))
+
+    def _is_retryable(self, error):
+        """Indique si une erreur est transitoire (quota, indisponibilité, délai)"""
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        if type(error).__name__ in RETRYABLE_ERRORS:
+            return True
+        return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def _create_backend():
+    """Crée le backend selon LLM_BACKEND (gemini, fake, record ou replay)"""
+    backend = os.getenv('LLM_BACKEND', 'gemini').lower()
+    if backend == 'fake':
+        return FakeBackend()
+    if backend in ('record', 'replay'):
+        from .llm_cassette import RecordingBackend, ReplayBackend
+
+        cassette = os.getenv('LLM_CASSETTE', str(Path(__file__).parent.parent / "data" / "llm_cassette.json"))
+        if backend == 'record':
+            return RecordingBackend(GeminiBackend(), cassette)
+        return ReplayBackend(cassette, latency=os.getenv('LLM_REPLAY_LATENCY', 'none'))
+    return GeminiBackend()
+
+
+def get_llm_gateway():
+    """Retourne la passerelle LLM partagée par tout le processus"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                load_dotenv()
+                _gateway = LLMGateway(
+                    _create_backend(),
+                    rate_per_second=float(os.getenv('LLM_RATE_PER_SECOND', 2.0)),
+                    burst=int(os.getenv('LLM_BURST', 5)),
+                    max_in_flight=int(os.getenv('LLM_MAX_IN_FLIGHT', 4)),
+                    max_retries=int(os.getenv('LLM_MAX_RETRIES', 3))
+                )
+    return _gateway
+
+
+def set_llm_gateway(gateway):
+    """Remplace la passerelle partagée (backend local, enregistrement...)"""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
@@ -0,0 +1,264 @@
+import re
+import threading
+import unicodedata
+from collections import deque
+import numpy as np
+
+
+def _normalize(text):
+    """Forme normalisée d'un libellé : minuscules, sans accents ni ponctuation superflue"""
+    text = "".join(c for c in unicodedata.normalize("NFKD", str(text)) if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def _bit_offsets(bitset):
+    """Positions des bits à 1 d'un entier, dans l'ordre croissant"""
+    if bitset == 0:
+        return []
+    raw = np.frombuffer(bitset.to_bytes((bitset.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")).tolist()
+
+
+class PrerequisiteGraph:
+    """Graphe orienté acyclique des prérequis entre contenus, construit à partir du catalogue
+
+    Les prérequis et suites (``prerequisites``, ``next_steps``) sont résolus par identifiant,
+    titre ou nom de module. Chaque module est un nœud atteint par chacun de ses contenus. Les
+    arcs qui fermeraient un cycle sont écartés. Après un tri topologique, chaque nœud reçoit
+    deux bitsets (descendants et ancêtres) décalés sur sa position : tester l'accessibilité
+    est en O(1) et ne stocke que l'étendue utile.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._version = None
+        self._build([])
+
+    def _ensure(self):
+        self.catalog.refresh()
+        version = self.catalog.version
+        if self._version != version:
+            self._build(self.catalog.items())
+            self._version = version
+
+    def _build(self, items):
+        nodes, index, aliases = [], {}, {}
+
+        def node(key, label, item=None):
+            if key not in index:
+                index[key] = len(nodes)
+                nodes.append({"key": key, "label": label, "item": item})
+            return index[key]
+
+        for item in items:
+            if item.get("id") is None:
+                continue
+            v = node(("content", item["id"]), item.get("title") or item["id"], item)
+            for alias in (item["id"], item.get("title")):
+                if alias:
+                    aliases.setdefault(_normalize(alias), v)
+            if item.get("module"):
+                m = node(("module", item["module"]), item["module"])
+                aliases.setdefault(_normalize(item["module"]), m)
+
+        edges = set()
+        self.unresolved = 0
+        for item in items:
+            if item.get("id") is None:
+                continue
+            v = index[("content", item["id"])]
+            own_module = index[("module", item["module"])] if item.get("module") else None
+            if own_module is not None:
+                edges.add((v, own_module))
+            for reference, forward in [(p, False) for p in item.get("prerequisites") or []] + \
+                                      [(n, True) for n in item.get("next_steps") or []]:
+                other = aliases.get(_normalize(reference)) if isinstance(reference, str) else None
+                if other is None:
+                    self.unresolved += 1
+                elif other not in (v, own_module):
+                    edges.add((v, other) if forward else (other, v))
+
+        children = [[] for _ in nodes]
+        for u, v in sorted(edges):
+            children[u].append(v)
+        order, self.dropped_edges = self._topological_order(children)
+        position = [0] * len(nodes)
+        for rank, v in enumerate(order):
+            position[v] = rank
+        parents = [[] for _ in nodes]
+        for u, kids in enumerate(children):
+            for v in kids:
+                parents[v].append(u)
+
+        # Bitsets relatifs : bit i de descendants[v] = nœud en position pos(v) + i,
+        # bit i de ancestors[v] = nœud en position pos(v) - i
+        descendants = [0] * len(nodes)
+        for v in reversed(order):
+            bits = 1
+            for c in children[v]:
+                bits |= descendants[c] << (position[c] - position[v])
+            descendants[v] = bits
+        ancestors = [0] * len(nodes)
+        for v in order:
+            bits = 1
+            for p in parents[v]:
+                bits |= ancestors[p] << (position[v] - position[p])
+            ancestors[v] = bits
+
+        self._nodes = nodes
+        self._index = index
+        self._aliases = aliases
+        self._children = children
+        self._parents = parents
+        self._order = order
+        self._position = position
+        self._descendants = descendants
+        self._ancestors = ancestors
+
+    def _topological_order(self, children):
+        """Tri topologique par parcours en profondeur itératif ; les arcs retour sont supprimés"""
+        state = [0] * len(children)  # 0 : non visité, 1 : en cours, 2 : terminé
+        postorder = []
+        dropped = 0
+        for root in range(len(children)):
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, 0)]
+            while stack:
+                v, i = stack[-1]
+                if i < len(children[v]):
+                    stack[-1] = (v, i + 1)
+                    c = children[v][i]
+                    if state[c] == 1:
+                        children[v].pop(i)
+                        stack[-1] = (v, i)
+                        dropped += 1
+                    elif state[c] == 0:
+                        state[c] = 1
+                        stack.append((c, 0))
+                else:
+                    state[v] = 2
+                    postorder.append(v)
+                    stack.pop()
+        return postorder[::-1], dropped
+
+    # --- Requêtes ----------------------------------------------------------------------------
+
+    def resolve(self, reference):
+        """Nœud correspondant à un identifiant, un titre ou un module"""
+        with self._lock:
+            self._ensure()
+            return self._resolve(reference)
+
+    def _resolve(self, reference):
+        if ("content", reference) in self._index:
+            return self._index[("content", reference)]
+        if ("module", reference) in self._index:
+            return self._index[("module", reference)]
+        return self._aliases.get(_normalize(reference))
+
+    def _reaches(self, u, v):
+        offset = self._position[v] - self._position[u]
+        return offset >= 0 and (self._descendants[u] >> offset) & 1 == 1
+
+    def reaches(self, source, target):
+        """Indique si ``target`` est accessible depuis ``source`` (prérequis direct ou indirect)"""
+        with self._lock:
+            self._ensure()
+            u, v = self._resolve(source), self._resolve(target)
+            return u is not None and v is not None and self._reaches(u, v)
+
+    def _ancestor_nodes(self, v):
+        return [self._order[self._position[v] - i] for i in _bit_offsets(self._ancestors[v])]
+
+    def _describe(self, v):
+        item = self._nodes[v]["item"]
+        if item is None:
+            return {"module": self._nodes[v]["label"]}
+        return {key: item.get(key) for key in ("id", "title", "subject", "module", "difficulty", "duration")}
+
+    def _mastered_nodes(self, mastered):
+        nodes = {self._index[("content", c)] for c in mastered if ("content", c) in self._index}
+        # Les prérequis d'un contenu maîtrisé sont considérés comme acquis
+        covered = set()
+        for v in nodes:
+            covered.update(self._ancestor_nodes(v))
+        return covered
+
+    def prerequisites_to_learn(self, mastered, target):
+        """Tous les contenus encore à apprendre avant (et y compris) la cible, dans l'ordre topologique"""
+        with self._lock:
+            self._ensure()
+            v = self._resolve(target)
+            if v is None:
+                return []
+            covered = self._mastered_nodes(mastered)
+            needed = [u for u in self._ancestor_nodes(v) if u not in covered and self._nodes[u]["item"] is not None]
+            return [self._describe(u) for u in sorted(needed, key=self._position.__getitem__)]
+
+    def shortest_path(self, mastered, target):
+        """Plus courte suite de contenus menant des acquis de l'étudiant à la cible"""
+        with self._lock:
+            self._ensure()
+            v = self._resolve(target)
+            if v is None:
+                return []
+            covered = self._mastered_nodes(mastered)
+            if v in covered:
+                return []
+            # Départ : acquis qui mènent à la cible, à défaut les racines qui y mènent
+            sources = [u for u in covered if self._reaches(u, v)]
+            if not sources:
+                sources = [u for u in self._ancestor_nodes(v) if not self._parents[u]]
+
+            previous = {u: None for u in sources}
+            queue = deque(sources)
+            while queue:
+                u = queue.popleft()
+                if u == v:
+                    break
+                for c in self._children[u]:
+                    # Ne suivre que les arcs qui rapprochent de la cible
+                    if c not in previous and self._reaches(c, v):
+                        previous[c] = u
+                        queue.append(c)
+            if v not in previous:
+                return []
+
+            path = []
+            u = v
+            while u is not None:
+                if u not in covered and (self._nodes[u]["item"] is not None or u == v):
+                    path.append(self._describe(u))
+                u = previous[u]
+            return path[::-1]
+
+    def next_steps(self, mastered, limit=5):
+        """Contenus dont tous les prérequis sont acquis, en privilégiant ceux qui prolongent les acquis"""
+        with self._lock:
+            self._ensure()
+            done = self._mastered_nodes(mastered)
+            # Comme dans prerequisites_to_learn, un module n'est acquis qu'avec tous ses contenus
+            for v in self._order:
+                if self._nodes[v]["item"] is None and v not in done and all(p in done for p in self._parents[v]):
+                    done.add(v)
+
+            ready = [
+                v for v in self._order
+                if self._nodes[v]["item"] is not None and v not in done
+                and all(p in done for p in self._parents[v])
+            ]
+            ready.sort(key=lambda v: (not self._parents[v], self._position[v]))
+            return [self._describe(v) for v in ready[:limit]]
+
+    def stats(self):
+        with self._lock:
+            self._ensure()
+            return {
+                "nodes": len(self._nodes),
+                "edges": sum(len(kids) for kids in self._children),
+                "dropped_edges": self.dropped_edges,
+                "unresolved_references": self.unresolved
+            }
@@ -0,0 +1,215 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class RecommendationPrecomputeWorker:
+    """Recalcule en arrière-plan les recommandations des étudiants dont les données changent"""
+
+    PREFERENCE_KEYS = ("module", "difficulty", "duration", "content_types", "learning_goal")
+
+    def __init__(self, content_agent, student_agent, cache_file=None, poll_interval=5.0, max_age=3600, count=5):
+        self.content_agent = content_agent
+        self.student_agent = student_agent
+        self.cache_file = cache_file or content_agent.data_dir / "precomputed_recommendations.json"
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.count = count
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._queue = []
+        self._pending = {}
+        self._sequence = itertools.count()
+        self._entries = self._load_cache()
+
+        # Derniers états connus des fichiers surveillés
+        self._file_mtimes = {}
+        self._record_counts = {}
+        self._records_scanned = False
+        self._preferences_snapshot = {}
+
+        # Abonnement partagé : reçoit les mises à jour faites par n'importe quelle instance de StudentAgent
+        self._unregister_listener = student_agent.add_preferences_listener(self._on_preferences_updated)
+
+    def start(self):
+        """Démarre le thread de précalcul"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="recommendation-precompute", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Arrête le thread de précalcul et se désabonne des mises à jour des préférences"""
+        self._unregister_listener()
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def notify(self, student_id, subject=None, preferences=None, activity_time=None):
+        """Planifie le recalcul des recommandations d'un étudiant (les plus actifs en premier)"""
+        activity_time = activity_time or time.time()
+        key = self._entry_key(student_id, subject)
+        with self._lock:
+            sequence = next(self._sequence)
+            self._pending[key] = (sequence, preferences)
+            heapq.heappush(self._queue, (-activity_time, sequence, student_id, subject))
+        self._wakeup.set()
+
+    def get_precomputed(self, student_id, subject=None, preferences=None):
+        """Retourne les recommandations précalculées et leur date de calcul, ou None"""
+        with self._lock:
+            entry = self._entries.get(self._entry_key(student_id, subject))
+        if entry is None:
+            return None
+        if preferences is not None and entry["preferences_key"] != self._preferences_key(preferences):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        """Indique si une entrée précalculée est encore récente"""
+        computed_at = datetime.fromisoformat(entry["computed_at"])
+        return (datetime.now() - computed_at).total_seconds() < self.max_age
+
+    def store(self, student_id, subject, preferences, recommendations):
+        """Enregistre un jeu de recommandations avec son horodatage de fraîcheur"""
+        entry = {
+            "student_id": student_id,
+            "subject": subject,
+            "preferences_key": self._preferences_key(preferences),
+            "recommendations": recommendations,
+            "computed_at": datetime.now().isoformat()
+        }
+        with self._lock:
+            self._entries[self._entry_key(student_id, subject)] = entry
+            self._save_cache()
+        return entry
+
+    def _on_preferences_updated(self, student_id, new_preferences):
+        """Appelé par StudentAgent.update_learning_preferences"""
+        self.notify(student_id, new_preferences.get("subject"), new_preferences)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._watch_files()
+                self._process_queue()
+            except Exception as e:
+                print(f"Erreur dans le précalcul des recommandations: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _process_queue(self):
+        """Traite les demandes en attente, les plus récemment actives en premier"""
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._queue:
+                    return
+                _, sequence, student_id, subject = heapq.heappop(self._queue)
+                key = self._entry_key(student_id, subject)
+                pending = self._pending.get(key)
+                # Ignorer les demandes remplacées par une demande plus récente
+                if pending is None or pending[0] != sequence:
+                    continue
+                del self._pending[key]
+                preferences = pending[1]
+
+            if preferences is None:
+                preferences = self._preferences_snapshot.get(student_id) or {}
+            preferences = {k: preferences[k] for k in self.PREFERENCE_KEYS if k in preferences}
+            recommendations = self.content_agent.recommend_content(
+                student_id,
+                subject=subject,
+                preferences=preferences,
+                count=self.count
+            )
+            self.store(student_id, subject, preferences, recommendations)
+
+    def _watch_files(self):
+        """Détecte les nouveaux enregistrements d'apprentissage et les préférences modifiées"""
+        learning_file = self.content_agent.learning_data_file
+        students_file = self.student_agent.students_file
+
+        if self._file_changed(students_file):
+            with open(students_file, "r", encoding='utf-8') as f:
+                students = json.load(f)["students"]
+            for student in students:
+                preferences = student.get("current_preferences")
+                if preferences is None:
+                    continue
+                previous = self._preferences_snapshot.get(student["id"])
+                self._preferences_snapshot[student["id"]] = preferences
+                if previous is not None and previous != preferences:
+                    self.notify(student["id"], preferences.get("subject"), preferences)
+
+        if self._file_changed(learning_file):
+            with open(learning_file, "r", encoding='utf-8') as f:
+                records = json.load(f)["learning_records"]
+            counts = {}
+            last_activity = {}
+            for record in records:
+                student_id = record["student_id"]
+                counts[student_id] = counts.get(student_id, 0) + 1
+                last_activity[student_id] = max(last_activity.get(student_id, ""), record.get("timestamp", ""))
+
+            # Le premier parcours n'établit que l'état de référence, même si le journal est vide
+            first_scan = not self._records_scanned
+            for student_id, count in counts.items():
+                if not first_scan and count != self._record_counts.get(student_id):
+                    preferences = self._preferences_snapshot.get(student_id) or {}
+                    self.notify(
+                        student_id,
+                        preferences.get("subject"),
+                        activity_time=self._to_epoch(last_activity[student_id])
+                    )
+            self._record_counts = counts
+            self._records_scanned = True
+
+    def _file_changed(self, path):
+        """Compare la date de modification d'un fichier à la dernière connue"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        changed = self._file_mtimes.get(path) != mtime
+        self._file_mtimes[path] = mtime
+        return changed
+
+    def _to_epoch(self, timestamp):
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+
+    def _entry_key(self, student_id, subject):
+        return f"{student_id}|{subject or ''}"
+
+    def _preferences_key(self, preferences):
+        """Représentation stable des préférences utilisées pour le calcul"""
+        preferences = preferences or {}
+        return json.dumps({k: preferences.get(k) for k in self.PREFERENCE_KEYS}, sort_keys=True, ensure_ascii=False)
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding='utf-8') as f:
+                return json.load(f).get("entries", {})
+        except Exception as e:
+            print(f"Erreur lors du chargement des recommandations précalculées: {str(e)}")
+            return {}
+
+    def _save_cache(self):
+        """Écrit le cache de manière atomique"""
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w", encoding='utf-8') as f:
+            json.dump({"entries": self._entries}, f, indent=4, ensure_ascii=False, default=str)
+        os.replace(tmp_file, self.cache_file)
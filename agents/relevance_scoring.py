@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class RelevanceScorer:
+    """Calcule la pertinence de N recommandations candidates en une seule passe NumPy"""
+
+    WEIGHTS = {
+        'learning_style': 0.3,
+        'difficulty': 0.2,
+        'duration': 0.15,
+        'content_type': 0.2,
+        'subject_relevance': 0.15
+    }
+
+    def __init__(self, weights=None):
+        self.weights = dict(self.WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+
+    def encode(self, candidates):
+        """Encode les candidats sous forme de tableaux (codes de type, difficulté, durée, codes de sujet)"""
+        types = [str(c.get('type') or '') for c in candidates]
+        subjects = [str(c.get('subject') or '') for c in candidates]
+        type_vocab, type_codes = np.unique(np.array(types, dtype=object), return_inverse=True)
+        subject_vocab, subject_codes = np.unique(np.array(subjects, dtype=object), return_inverse=True)
+
+        return {
+            "ids": [c.get('id') for c in candidates],
+            "type_vocab": type_vocab.tolist(),
+            "type_codes": type_codes.reshape(-1),
+            "subject_vocab": subject_vocab.tolist(),
+            "subject_codes": subject_codes.reshape(-1),
+            "difficulty": self._to_float_array([c.get('difficulty') for c in candidates]),
+            "duration": self._to_float_array([c.get('duration') for c in candidates])
+        }
+
+    def _to_float_array(self, values):
+        """Convertit une liste de valeurs en tableau float (NaN pour les valeurs manquantes)"""
+        converted = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                converted[i] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return converted
+
+    def score(self, batch, profile, preferences=None, difficulty_lookup=None):
+        """Calcule toutes les composantes pondérées de pertinence pour un lot encodé
+
+        ``difficulty_lookup`` reçoit la liste des identifiants et retourne un tableau de
+        difficultés calibrées (NaN lorsque la difficulté déclarée doit être conservée).
+        """
+        weights = self.weights
+        n = len(batch["type_codes"])
+        scores = np.zeros(n)
+        if n == 0:
+            return scores
+
+        type_vocab = batch["type_vocab"]
+        type_codes = batch["type_codes"]
+
+        # Correspondance du style d'apprentissage
+        style_mask = np.array([t == profile['learning_style'] for t in type_vocab], dtype=bool)
+        scores += weights['learning_style'] * style_mask[type_codes]
+
+        # Difficulté (calibrée lorsqu'elle est connue)
+        if preferences and 'difficulty' in preferences:
+            values = batch["difficulty"]
+            if difficulty_lookup is not None:
+                calibrated = difficulty_lookup(batch["ids"])
+                values = np.where(np.isnan(calibrated), values, calibrated)
+            diff_match = 1 - np.abs(values - preferences['difficulty']) / 4
+            scores += weights['difficulty'] * np.nan_to_num(diff_match, nan=0.0)
+
+        # Durée
+        if preferences and 'duration' in preferences and preferences['duration']:
+            duration_match = 1 - np.abs(batch["duration"] - preferences['duration']) / preferences['duration']
+            scores += weights['duration'] * np.nan_to_num(np.maximum(0, duration_match), nan=0.0)
+
+        # Types de contenu préférés : une correspondance par type distinct, pas par candidat
+        if preferences and 'content_types' in preferences:
+            wanted = [ct.lower() for ct in preferences['content_types']]
+            type_mask = np.array([any(ct in t.lower() for ct in wanted) for t in type_vocab], dtype=bool)
+            scores += weights['content_type'] * type_mask[type_codes]
+
+        # Pertinence du sujet : priorité aux sujets nécessitant de l'amélioration
+        if profile.get('subject_performance'):
+            subject_scores = profile['subject_performance'].get('score', {})
+            subject_mask = np.array(
+                [s in subject_scores and subject_scores[s] < 0.7 for s in batch["subject_vocab"]],
+                dtype=bool
+            )
+            scores += weights['subject_relevance'] * subject_mask[batch["subject_codes"]]
+
+        return scores
+
+    def top_k(self, scores, k, threshold=None):
+        """Retourne les indices des k meilleurs scores, triés par pertinence décroissante"""
+        candidates = np.arange(len(scores))
+        if threshold is not None:
+            candidates = candidates[scores[candidates] > threshold]
+        if k <= 0 or len(candidates) == 0:
+            return np.array([], dtype=int)
+
+        if len(candidates) > k:
+            partition = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = np.sort(candidates[partition])
+
+        # Tri stable pour conserver l'ordre d'origine en cas d'égalité
+        order = np.argsort(-scores[candidates], kind='stable')
+        return candidates[order]
+
+    def rank(self, candidates, profile, preferences=None, count=5, threshold=0.5, difficulty_lookup=None):
+        """Score et sélectionne les meilleures recommandations parmi les candidats"""
+        batch = self.encode(candidates)
+        scores = self.score(batch, profile, preferences, difficulty_lookup=difficulty_lookup)
+        ranked = []
+        for idx in self.top_k(scores, count, threshold=threshold):
+            rec = candidates[idx]
+            rec['relevance_score'] = float(scores[idx])
+            ranked.append(rec)
+        return ranked
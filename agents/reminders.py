@@ -0,0 +1,186 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+from .timing_wheel import HierarchicalTimingWheel
+
+
+class JSONLReminderSink:
+    """Écrit les rappels envoyés dans un fichier JSON Lines (tests locaux)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def deliver(self, reminders):
+        with self._lock, open(self.path, "a", encoding='utf-8') as f:
+            for reminder in reminders:
+                f.write(json.dumps(reminder, ensure_ascii=False) + "\n")
+
+
+class CallbackReminderSink:
+    """Transmet les rappels à une fonction (notification push, e-mail, file de messages...)"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def deliver(self, reminders):
+        for reminder in reminders:
+            self.callback(reminder)
+
+
+class ReminderDispatcher:
+    """Programme et envoie les rappels des étudiants à l'aide d'une roue temporelle hiérarchique
+
+    Les rappels échus sont remis par lots au ``sink`` (tout objet exposant ``deliver(reminders)``).
+    Le retard de remise (instant d'envoi - échéance) est mesuré pour chaque rappel.
+    """
+
+    def __init__(self, sink, tick=1.0, clock=time.time, lag_window=10000):
+        self.sink = sink
+        self.tick = tick
+        self.clock = clock
+        self._wheel = HierarchicalTimingWheel(tick=tick, start=clock())
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._keys = {}
+        # Rappels programmés et non encore échus (identifiant → clé), annulés ou non
+        self._pending = {}
+        self._cancelled = set()
+        self._lags = deque(maxlen=lag_window)
+        self._thread = None
+        self._stop = threading.Event()
+        self.delivered = 0
+        self.failed = 0
+
+    def schedule(self, student_id, when, message, kind="session", key=None, **payload):
+        """Programme un rappel ; ``key`` évite de programmer deux fois le même rappel"""
+        deadline = when.timestamp() if isinstance(when, datetime) else float(when)
+        with self._lock:
+            if key is not None and key in self._keys:
+                return self._keys[key]
+            reminder_id = next(self._ids)
+            reminder = {
+                "id": reminder_id,
+                "student_id": student_id,
+                "kind": kind,
+                "message": message,
+                "due": datetime.fromtimestamp(deadline).isoformat(),
+                "key": key,
+                **payload
+            }
+            self._wheel.insert(deadline, reminder)
+            self._pending[reminder_id] = key
+            if key is not None:
+                self._keys[key] = reminder_id
+            return reminder_id
+
+    def cancel(self, reminder_id):
+        """Annule un rappel en attente ; sans effet (False) s'il est déjà envoyé, annulé ou inconnu"""
+        with self._lock:
+            if reminder_id not in self._pending or reminder_id in self._cancelled:
+                return False
+            self._cancelled.add(reminder_id)
+            # La clé est libérée : le même rappel peut être reprogrammé
+            key = self._pending[reminder_id]
+            if key is not None and self._keys.get(key) == reminder_id:
+                del self._keys[key]
+            return True
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending) - len(self._cancelled)
+
+    def dispatch_due(self, now=None):
+        """Remet au sink les rappels échus et retourne leur nombre"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            expired = self._wheel.advance(now)
+            batch = []
+            for deadline, reminder in expired:
+                self._pending.pop(reminder["id"], None)
+                if reminder.get("key") is not None and self._keys.get(reminder["key"]) == reminder["id"]:
+                    del self._keys[reminder["key"]]
+                if reminder["id"] in self._cancelled:
+                    self._cancelled.discard(reminder["id"])
+                    continue
+                batch.append(dict(reminder, sent_at=datetime.fromtimestamp(now).isoformat()))
+                self._lags.append(now - deadline)
+        if not batch:
+            return 0
+
+        try:
+            self.sink.deliver(batch)
+            self.delivered += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Erreur lors de l'envoi des rappels: {str(e)}")
+        return len(batch)
+
+    def metrics(self):
+        """Rappels en attente, envoyés, en échec et retard de remise (secondes)"""
+        with self._lock:
+            lags = np.array(self._lags) if self._lags else np.zeros(0)
+            pending = len(self._pending) - len(self._cancelled)
+        lag = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        if len(lags):
+            p50, p95, p99 = np.percentile(lags, [50, 95, 99])
+            lag = {"mean": float(lags.mean()), "p50": float(p50), "p95": float(p95),
+                   "p99": float(p99), "max": float(lags.max())}
+        return {"pending": pending, "delivered": self.delivered, "failed": self.failed, "lag_seconds": lag}
+
+    def start(self):
+        """Démarre l'envoi en arrière-plan, à chaque tick"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.dispatch_due()
+            # Se caler sur le prochain tick
+            self._stop.wait(self.tick - (self.clock() % self.tick))
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_reminder_dispatcher(reminders_file):
+    """Retourne le répartiteur partagé par le processus, qui écrit ses rappels dans ``reminders_file``
+
+    Les rappels programmés ne sont conservés qu'en mémoire : ``TutorAgent.schedule_reminders``
+    les recalcule à partir des données (sans doublon grâce aux clés) après un redémarrage.
+    """
+    key = str(Path(reminders_file).resolve())
+    with _dispatchers_lock:
+        if key not in _dispatchers:
+            _dispatchers[key] = ReminderDispatcher(JSONLReminderSink(reminders_file))
+        return _dispatchers[key]
+
+
+def next_occurrences(hours, days=None, horizon_days=7, now=None):
+    """Prochaines occurrences des heures données (et des jours 0-6 donnés) sur l'horizon"""
+    now = now or datetime.now()
+    start = now.replace(minute=0, second=0, microsecond=0)
+    moments = []
+    for offset in range(horizon_days + 1):
+        day = start + timedelta(days=offset)
+        if days is not None and day.weekday() not in days:
+            continue
+        for hour in sorted(set(hours)):
+            moment = day.replace(hour=int(hour))
+            if now < moment <= now + timedelta(days=horizon_days):
+                moments.append(moment)
+    return moments
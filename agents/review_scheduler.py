@@ -0,0 +1,241 @@
+import atexit
+import hashlib
+import heapq
+import json
+import math
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+def _timestamp(value):
+    """Horodatage (secondes depuis l'epoch) d'une date ISO, ou None"""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        try:
+            return pd.Timestamp(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+
+def _fingerprint(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def _smallest(heap, is_live, limit=None, until=None):
+    """Parcourt un tas binaire dans l'ordre croissant sans le modifier
+
+    Seuls les nœuds visités et leurs enfants entrent dans la frontière : obtenir les k premiers
+    éléments coûte O(k log k), quelle que soit la taille du tas.
+    """
+    results = []
+    frontier = [(heap[0], 0)] if heap else []
+    while frontier and (limit is None or len(results) < limit):
+        entry, position = heapq.heappop(frontier)
+        if until is not None and entry[0] > until:
+            break
+        if is_live(entry):
+            results.append(entry)
+        for child in (2 * position + 1, 2 * position + 2):
+            if child < len(heap):
+                heapq.heappush(frontier, (heap[child], child))
+    return results
+
+
+class ReviewScheduler:
+    """Planification des révisions espacées par (étudiant, sous-thème) selon le modèle SM-2
+
+    Chaque enregistrement d'apprentissage est une révision dont la qualité (0-5) est déduite du
+    score. Les prochaines échéances sont conservées dans un tas global et dans un tas par
+    étudiant ; les entrées périmées sont ignorées à la lecture puis éliminées par compaction.
+    """
+
+    MIN_EASINESS = 1.3
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._states = {}
+            self._heap = []
+            self._student_heaps = {}
+            self._sequence = 0
+            self.records_seen = 0
+            self._last_record = None
+            self._last_fingerprint = None
+
+    # --- Modèle SM-2 -------------------------------------------------------------------------
+
+    def _quality(self, score):
+        return int(round(min(max(score, 0.0), 1.0) * 5))
+
+    def ingest(self, record):
+        with self._lock:
+            self.records_seen += 1
+            self._last_record = record
+            self._review(record)
+
+    def _review(self, record):
+        score = record.get("score")
+        if record.get("content_type") == "initial" or not isinstance(score, (int, float)) or math.isnan(score):
+            return
+        topic = record.get("sub_topic") or record.get("subject")
+        reviewed_at = _timestamp(record.get("timestamp"))
+        if topic is None or reviewed_at is None:
+            return
+
+        key = (record.get("student_id"), topic)
+        state = self._states.get(key)
+        if state is None:
+            # [facilité, intervalle (jours), répétitions, échéance, dernière révision, séquence]
+            state = self._states[key] = [2.5, 0.0, 0, 0.0, reviewed_at, 0]
+
+        quality = self._quality(score)
+        if quality >= 3:
+            state[1] = 1.0 if state[2] == 0 else 6.0 if state[2] == 1 else state[1] * state[0]
+            state[2] += 1
+        else:
+            state[1] = 1.0
+            state[2] = 0
+        state[0] = max(self.MIN_EASINESS, state[0] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        state[4] = max(state[4], reviewed_at)
+        state[3] = state[4] + state[1] * 86400
+        self._schedule(key, state)
+
+    def _schedule(self, key, state):
+        self._sequence += 1
+        state[5] = self._sequence
+        heapq.heappush(self._heap, (state[3], self._sequence, key))
+        heapq.heappush(self._student_heaps.setdefault(key[0], []), (state[3], self._sequence, key))
+        if len(self._heap) > 2 * len(self._states) + 1024:
+            self._compact()
+
+    def _is_live(self, entry):
+        state = self._states.get(entry[2])
+        return state is not None and state[5] == entry[1]
+
+    def _compact(self):
+        """Élimine les entrées périmées des tas"""
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+        for student_id, heap in self._student_heaps.items():
+            heap[:] = [entry for entry in heap if self._is_live(entry)]
+            heapq.heapify(heap)
+
+    # --- Consultation ------------------------------------------------------------------------
+
+    def _describe(self, entry):
+        state = self._states[entry[2]]
+        return {
+            "student_id": entry[2][0],
+            "sub_topic": entry[2][1],
+            "due": datetime.fromtimestamp(state[3]).isoformat(),
+            "interval_days": round(state[1], 2),
+            "easiness": round(state[0], 3),
+            "repetitions": state[2]
+        }
+
+    def due_for_student(self, student_id, now=None):
+        """Révisions échues d'un étudiant, de la plus ancienne échéance à la plus récente"""
+        now = (now or datetime.now()).timestamp()
+        with self._lock:
+            heap = self._student_heaps.get(student_id, [])
+            return [self._describe(entry) for entry in _smallest(heap, self._is_live, until=now)]
+
+    def next_due(self, limit=1000, student_id=None):
+        """Prochaines révisions, tous étudiants confondus (ou pour un étudiant)"""
+        with self._lock:
+            heap = self._heap if student_id is None else self._student_heaps.get(student_id, [])
+            return [self._describe(entry) for entry in _smallest(heap, self._is_live, limit=limit)]
+
+    def __len__(self):
+        return len(self._states)
+
+    @property
+    def last_fingerprint(self):
+        """Empreinte du dernier enregistrement traité, pour vérifier qu'une sauvegarde est à jour"""
+        if self._last_record is not None:
+            return _fingerprint(self._last_record)
+        return self._last_fingerprint
+
+    # --- Persistance -------------------------------------------------------------------------
+
+    def save(self, path):
+        """Sauvegarde l'état au format NumPy compressé (tableaux en colonnes)"""
+        with self._lock:
+            keys = list(self._states)
+            states = np.array([self._states[key][:5] for key in keys], dtype=np.float64).reshape(-1, 5)
+            tmp_file = Path(str(path) + ".tmp.npz")
+            np.savez_compressed(
+                tmp_file,
+                student_ids=np.array([str(key[0]) for key in keys], dtype=str),
+                sub_topics=np.array([str(key[1]) for key in keys], dtype=str),
+                easiness=states[:, 0].astype(np.float32),
+                interval=states[:, 1].astype(np.float32),
+                repetitions=states[:, 2].astype(np.int32),
+                due=states[:, 3],
+                last_review=states[:, 4],
+                records_seen=self.records_seen,
+                last_fingerprint=str(self.last_fingerprint or "")
+            )
+            os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        """Charge un état sauvegardé ; trié par échéance, chaque tableau est directement un tas valide"""
+        scheduler = cls()
+        with np.load(path) as data:
+            order = np.argsort(data["due"], kind='stable')
+            columns = [data[name][order].tolist() for name in
+                       ("student_ids", "sub_topics", "easiness", "interval", "repetitions", "due", "last_review")]
+            scheduler.records_seen = int(data["records_seen"])
+            scheduler._last_fingerprint = str(data["last_fingerprint"]) or None
+
+        for sequence, (student_id, topic, easiness, interval, repetitions, due, last_review) in enumerate(zip(*columns), 1):
+            key = (student_id, topic)
+            scheduler._states[key] = [easiness, interval, repetitions, due, last_review, sequence]
+            scheduler._heap.append((due, sequence, key))
+            scheduler._student_heaps.setdefault(student_id, []).append((due, sequence, key))
+        scheduler._sequence = len(scheduler._states)
+        return scheduler
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_review_scheduler(schedule_file, learning_log):
+    """Retourne le planificateur partagé, rechargé depuis sa sauvegarde puis abonné au journal"""
+    key = str(Path(schedule_file).resolve())
+    with _schedulers_lock:
+        if key in _schedulers:
+            return _schedulers[key]
+
+        with learning_log.lock:
+            scheduler = None
+            records = learning_log.records()
+            if Path(schedule_file).exists():
+                try:
+                    scheduler = ReviewScheduler.load(schedule_file)
+                    seen = scheduler.records_seen
+                    # La sauvegarde n'est réutilisable que si le journal l'a seulement complétée
+                    if seen > len(records) or (seen and _fingerprint(records[seen - 1]) != scheduler.last_fingerprint):
+                        scheduler = None
+                except Exception as e:
+                    print(f"Erreur lors du chargement du planning de révisions: {str(e)}")
+                    scheduler = None
+            if scheduler is None:
+                scheduler = ReviewScheduler()
+
+            learning_log.subscribe(scheduler, start=scheduler.records_seen)
+        atexit.register(scheduler.save, schedule_file)
+        _schedulers[key] = scheduler
+        return scheduler
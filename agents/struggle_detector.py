@@ -0,0 +1,128 @@
+import threading
+from collections import deque
+from .learning_indexes import _number
+
+
+class StruggleDetector:
+    """Détection en continu des difficultés par (étudiant, sous-thème), en O(1) par enregistrement
+
+    Deux signaux sont suivis :
+    - ``low_performance`` : moyenne glissante des derniers scores sous ``low_threshold`` ;
+    - ``declining`` : CUSUM unilatéral détectant une baisse par rapport au niveau habituel de
+      l'étudiant sur le sous-thème (moyenne exponentielle lente), réarmé après chaque alarme.
+    Une difficulté reste active jusqu'à ce que la moyenne glissante repasse au-dessus de
+    ``recovery_threshold``.
+    """
+
+    def __init__(self, window=5, min_attempts=3, low_threshold=0.6, recovery_threshold=0.7,
+                 cusum_slack=0.05, cusum_limit=0.4, baseline_rate=0.1):
+        self.window = window
+        self.min_attempts = min_attempts
+        self.low_threshold = low_threshold
+        self.recovery_threshold = recovery_threshold
+        self.cusum_slack = cusum_slack
+        self.cusum_limit = cusum_limit
+        self.baseline_rate = baseline_rate
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._states = {}
+            self._active = {}
+
+    def add_listener(self, callback):
+        """Enregistre une fonction appelée dès qu'une nouvelle difficulté est détectée"""
+        self._listeners.append(callback)
+
+    def ingest(self, record):
+        score = _number(record.get("score"))
+        topic = record.get("sub_topic") or record.get("subject")
+        if score is None or topic is None or record.get("content_type") == "initial":
+            return
+
+        student_id = record.get("student_id")
+        key = (student_id, topic)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = {
+                    "scores": deque(maxlen=self.window), "sum": 0.0, "attempts": 0,
+                    "cusum": 0.0, "baseline": None, "subject": record.get("subject")
+                }
+
+            # Fenêtre glissante : somme entretenue sans reparcourir les scores
+            if len(state["scores"]) == self.window:
+                state["sum"] -= state["scores"][0]
+            state["scores"].append(score)
+            state["sum"] += score
+            state["attempts"] += 1
+            window_mean = state["sum"] / len(state["scores"])
+
+            # CUSUM d'une baisse par rapport au niveau habituel
+            baseline = score if state["baseline"] is None else state["baseline"]
+            state["cusum"] = max(0.0, state["cusum"] + (baseline - score) - self.cusum_slack)
+            state["baseline"] = baseline + self.baseline_rate * (score - baseline)
+
+            reasons = []
+            if state["attempts"] >= self.min_attempts and window_mean < self.low_threshold:
+                reasons.append("low_performance")
+            cusum = state["cusum"]
+            if cusum > self.cusum_limit:
+                reasons.append("declining")
+                # Réarmer le CUSUM après une alarme ; la difficulté reste active jusqu'au rétablissement
+                state["cusum"] = 0.0
+
+            active = self._active.setdefault(student_id, {})
+            struggle = active.get(topic)
+            if struggle is not None and not reasons and window_mean >= self.recovery_threshold:
+                del active[topic]
+                return
+            if not reasons and struggle is None:
+                return
+
+            is_new = struggle is None
+            if is_new:
+                struggle = active[topic] = {
+                    "student_id": student_id,
+                    "sub_topic": topic,
+                    "subject": state["subject"],
+                    "since": record.get("timestamp"),
+                    "reasons": []
+                }
+            for reason in reasons:
+                if reason not in struggle["reasons"]:
+                    struggle["reasons"].append(reason)
+            struggle.update({
+                "window_mean": round(window_mean, 3),
+                "baseline": round(state["baseline"], 3),
+                "cusum": round(cusum, 3),
+                "attempts": state["attempts"],
+                "last_timestamp": record.get("timestamp")
+            })
+            snapshot = dict(struggle, reasons=list(struggle["reasons"]))
+
+        if is_new:
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    print(f"Erreur lors de la notification d'une difficulté: {str(e)}")
+
+    def struggles(self, student_id):
+        """Difficultés actives d'un étudiant, des plus marquées aux moins marquées"""
+        with self._lock:
+            active = [
+                dict(struggle, reasons=list(struggle["reasons"]))
+                for struggle in self._active.get(student_id, {}).values()
+            ]
+        return sorted(active, key=lambda s: (s["window_mean"], -s["cusum"]))
+
+    def all_struggles(self):
+        """Toutes les difficultés actives, par étudiant"""
+        with self._lock:
+            return {
+                student_id: [dict(struggle, reasons=list(struggle["reasons"])) for struggle in active.values()]
+                for student_id, active in self._active.items() if active
+            }
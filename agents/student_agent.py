@@ -1,16 +1,46 @@
 import json
+import threading
 from pathlib import Path
 import pandas as pd
 from datetime import datetime
 
+# Abonnés aux mises à jour des préférences, par fichier d'étudiants : partagés par toutes
+# les instances de StudentAgent du processus
+_preferences_listeners = {}
+_preferences_listeners_lock = threading.Lock()
+
+
 class StudentAgent:
     def __init__(self):
         self.data_dir = Path(__file__).parent.parent / "data"
         self.students_file = self.data_dir / "students.json"
         self.learning_data_file = self.data_dir / "learning_data.json"
-        self.feedback_file = self.data_dir / "feedback.json"
+        # Historique des feedbacks, tenu par le TutorAgent (FeedbackStore)
+        self.feedback_file = self.data_dir / "feedback_history.jsonl"
         self.init_data_files()
 
+    def _listeners_key(self):
+        return str(self.students_file.resolve())
+
+    def add_preferences_listener(self, callback):
+        """Enregistre une fonction appelée après chaque mise à jour des préférences, quelle que soit
+        l'instance qui l'effectue ; retourne une fonction qui annule l'abonnement"""
+        key = self._listeners_key()
+        with _preferences_listeners_lock:
+            _preferences_listeners.setdefault(key, []).append(callback)
+
+        def unregister():
+            with _preferences_listeners_lock:
+                listeners = _preferences_listeners.get(key, [])
+                if callback in listeners:
+                    listeners.remove(callback)
+        return unregister
+
+    @property
+    def preferences_listeners(self):
+        with _preferences_listeners_lock:
+            return list(_preferences_listeners.get(self._listeners_key(), []))
+
     def init_data_files(self):
         """Initialise les fichiers de données s'ils n'existent pas"""
         self.data_dir.mkdir(exist_ok=True)
@@ -634,6 +664,10 @@ class StudentAgent:
             with open(self.students_file, "w", encoding='utf-8') as f:
                 json.dump(students_data, f, indent=4, ensure_ascii=False)
 
+            # Prévenir les abonnés (précalcul des recommandations...)
+            for callback in self.preferences_listeners:
+                callback(student_id, new_preferences)
+
             return True
 
         except Exception as e:
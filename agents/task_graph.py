@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class TaskGraphExecutor:
+    """Exécute un graphe de tâches : chaque tâche démarre dès que ses dépendances sont terminées
+
+    Une tâche est une fonction recevant le dictionnaire des résultats de ses dépendances.
+    Les tâches indépendantes s'exécutent en parallèle. Si une tâche échoue, l'erreur est
+    conservée dans ``errors`` et les tâches qui en dépendent ne sont pas exécutées.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._tasks = {}
+        self.errors = {}
+
+    def add_task(self, name, func, depends_on=()):
+        """Déclare une tâche et les tâches dont elle dépend"""
+        self._tasks[name] = (func, tuple(depends_on))
+        return self
+
+    def _validate(self):
+        """Vérifie que les dépendances existent et ne forment pas de cycle"""
+        for name, (_, depends_on) in self._tasks.items():
+            unknown = [dep for dep in depends_on if dep not in self._tasks]
+            if unknown:
+                raise ValueError(f"Dépendances inconnues pour la tâche {name}: {', '.join(unknown)}")
+
+        remaining = {name: set(depends_on) for name, (_, depends_on) in self._tasks.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dépendances circulaires entre les tâches: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def run(self, on_result=None):
+        """Exécute toutes les tâches et retourne leurs résultats par nom
+
+        ``on_result(name, result)`` est appelé dès qu'une tâche se termine.
+        """
+        self._validate()
+        self.errors = {}
+        results = {}
+        waiting = {name: set(depends_on) for name, (_, depends_on) in self._tasks.items()}
+        dependents = {name: [] for name in self._tasks}
+        for name, (_, depends_on) in self._tasks.items():
+            for dep in depends_on:
+                dependents[dep].append(name)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(len(self._tasks), 1),
+                                thread_name_prefix="task-graph") as executor:
+            running = {}
+
+            def start_ready():
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    func, depends_on = self._tasks[name]
+                    inputs = {dep: results[dep] for dep in depends_on}
+                    running[executor.submit(func, inputs)] = name
+
+            def skip(name):
+                # Les tâches dépendant d'une tâche en échec ne sont pas exécutées
+                for dependent in dependents[name]:
+                    if dependent in waiting:
+                        del waiting[dependent]
+                        self.errors[dependent] = f"Dépendance en échec: {name}"
+                        skip(dependent)
+
+            start_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"Erreur dans la tâche {name}: {str(e)}")
+                        self.errors[name] = str(e)
+                        skip(name)
+                        continue
+                    if on_result is not None:
+                        on_result(name, results[name])
+                    for dependent in dependents[name]:
+                        if dependent in waiting:
+                            waiting[dependent].discard(name)
+                start_ready()
+        return results
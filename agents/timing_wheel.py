@@ -0,0 +1,90 @@
+import math
+
+
+class HierarchicalTimingWheel:
+    """Roue temporelle hiérarchique : insertion et expiration en O(1) amorti
+
+    Le niveau 0 compte ``wheel_size`` ticks, chaque niveau supérieur couvre ``wheel_size`` fois
+    la période du précédent. Une échéance est rangée au niveau le plus bas qui la contient ;
+    quand un niveau inférieur a fait un tour complet, le créneau correspondant du niveau
+    supérieur est redistribué vers le bas. Les échéances au-delà du dernier niveau attendent
+    dans une liste de débordement.
+    """
+
+    def __init__(self, tick=1.0, wheel_bits=6, levels=4, start=0.0):
+        self.tick = tick
+        self.bits = wheel_bits
+        self.mask = (1 << wheel_bits) - 1
+        self.levels = levels
+        self.current = self._to_tick(start)
+        self._wheels = [[[] for _ in range(1 << wheel_bits)] for _ in range(levels)]
+        self._overflow = []
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _to_tick(self, moment):
+        return int(math.floor(moment / self.tick))
+
+    def insert(self, deadline, item):
+        """Programme ``item`` pour l'instant ``deadline`` (même unité que ``tick``)"""
+        self._count += 1
+        # Arrondi supérieur : un élément n'expire jamais avant son échéance
+        return self._place(max(int(math.ceil(deadline / self.tick)), self.current), deadline, item)
+
+    def _place(self, target, deadline, item):
+        delta = target - self.current
+        for level in range(self.levels):
+            if delta < 1 << (self.bits * (level + 1)):
+                slot = (target >> (self.bits * level)) & self.mask
+                self._wheels[level][slot].append((target, deadline, item))
+                return level
+        self._overflow.append((target, deadline, item))
+        return self.levels
+
+    def advance(self, now):
+        """Avance jusqu'à ``now`` et retourne les éléments échus sous forme de (échéance, élément)"""
+        target = self._to_tick(now)
+        expired = []
+        if self._count == 0:
+            self.current = max(self.current, target)
+            return expired
+
+        # Traiter le tick courant (éléments programmés pour maintenant)
+        expired.extend(self._expire(self.current))
+        while self.current < target and self._count:
+            self.current += 1
+            self._cascade()
+            expired.extend(self._expire(self.current))
+        self.current = max(self.current, target)
+        return expired
+
+    def _expire(self, tick):
+        bucket = self._wheels[0][tick & self.mask]
+        if not bucket:
+            return []
+        due = [(deadline, item) for target, deadline, item in bucket if target <= tick]
+        bucket[:] = [entry for entry in bucket if entry[0] > tick]
+        self._count -= len(due)
+        return due
+
+    def _cascade(self):
+        """Redescend les créneaux des niveaux supérieurs quand les niveaux inférieurs bouclent"""
+        for level in range(1, self.levels):
+            if (self.current >> (self.bits * (level - 1))) & self.mask:
+                return
+            slot = (self.current >> (self.bits * level)) & self.mask
+            bucket = self._wheels[level][slot]
+            if bucket:
+                self._wheels[level][slot] = []
+                for target, deadline, item in bucket:
+                    self._place(target, deadline, item)
+
+        # Tous les niveaux ont bouclé : réexaminer le débordement
+        if (self.current >> (self.bits * (self.levels - 1))) & self.mask:
+            return
+        if self._overflow:
+            overflow, self._overflow = self._overflow, []
+            for target, deadline, item in overflow:
+                self._place(target, deadline, item)
@@ -2,24 +2,141 @@ import json
 from pathlib import Path
 import pandas as pd
 from datetime import datetime, timedelta
+from .feedback_result import FeedbackResult
+from .learning_records import get_learning_log, get_learning_record_writer
+from .learning_indexes import StudentTimeIndex
+from .class_scheduler import ClassScheduleOptimizer, capacity_matrix
+from .review_scheduler import get_review_scheduler
+from .reminders import get_reminder_dispatcher, next_occurrences
+from .struggle_detector import StruggleDetector
+from .feedback_store import get_feedback_store
+from .exercise_bank import get_exercise_bank
+from .llm_gateway import get_llm_gateway
+from .content_catalog import get_content_catalog
+from .prerequisite_graph import PrerequisiteGraph
+from models.knowledge_tracing import BayesianKnowledgeTracer
 
 class TutorAgent:
+    # Sections du feedback et méthode qui calcule chacune d'elles
+    FEEDBACK_SECTIONS = {
+        "performance_summary": "_generate_performance_summary",
+        "learning_plan": "_generate_learning_plan",
+        "personalized_advice": "_generate_personalized_advice",
+        "adaptive_recommendations": "_generate_adaptive_recommendations",
+        "progress_tracking": "_track_detailed_progress",
+        "skill_assessment": "_assess_skills",
+        "engagement_metrics": "_analyze_engagement",
+        "learning_path": "_suggest_learning_path",
+        "mastery_tracking": "_track_mastery_levels"
+    }
+
+    # Score moyen à partir duquel un contenu est considéré comme maîtrisé
+    MASTERY_THRESHOLD = 0.8
+
+    # Probabilités de maîtrise (BKT) délimitant les compétences acquises et en cours d'acquisition
+    SKILL_MASTERED = 0.95
+    SKILL_IN_PROGRESS = 0.6
+
+    # Jours de la semaine, dans l'ordre de datetime.weekday()
+    WEEK_DAYS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
     def __init__(self):
         self.data_dir = Path(__file__).parent.parent / "data"
         self.learning_data_file = self.data_dir / "learning_data.json"
-        self.feedback_file = self.data_dir / "feedback.json"
+        self.feedback_file = self.data_dir / "feedback_history.jsonl"
+        self.exercises_file = self.data_dir / "exercises.json"
+        self.content_file = self.data_dir / "content.json"
         self.init_data_files()
+        
+        # Lecture via le journal partagé, écritures différées via la file d'écriture
+        self.learning_log = get_learning_log(self.learning_data_file)
+        self.record_writer = get_learning_record_writer(self.learning_data_file)
+        
+        # Scores par jour et par heure de chaque étudiant, maintenus à l'arrivée des enregistrements
+        self.time_index = self.learning_log.shared_index("student_time", StudentTimeIndex)
+        
+        # Révisions espacées (SM-2) par sous-thème, rechargées depuis leur sauvegarde
+        self.review_schedule_file = self.data_dir / "review_schedule.npz"
+        self.review_scheduler = get_review_scheduler(self.review_schedule_file, self.learning_log)
+        
+        # Probabilité de maîtrise de chaque compétence (Bayesian Knowledge Tracing)
+        self.knowledge_tracer = self.learning_log.shared_index("knowledge_tracing", BayesianKnowledgeTracer)
+        
+        # Difficultés détectées en continu à l'arrivée des enregistrements
+        self.struggle_detector = self.learning_log.shared_index("struggles", StruggleDetector)
+        
+        # Rappels de séances et de révisions, envoyés par un répartiteur commun au processus
+        self.reminder_dispatcher = get_reminder_dispatcher(self.data_dir / "reminders.jsonl")
+        
+        # Historique des feedbacks, réutilisés tant que les données de l'étudiant n'ont pas changé
+        self.feedback_store = get_feedback_store(self.feedback_file)
+        self.feedback_store.import_legacy(self.data_dir / "feedback.json")
+        
+        # Banque d'exercices indexée, complétée par le LLM pour les combinaisons non couvertes
+        self.exercise_bank = get_exercise_bank(self.exercises_file)
+        self.model = get_llm_gateway()
+        
+        # Graphe des prérequis du catalogue, pour les parcours d'apprentissage
+        self.prerequisite_graph = PrerequisiteGraph(get_content_catalog(self.content_file))
 
     def init_data_files(self):
         """Initialise les fichiers de données s'ils n'existent pas"""
         self.data_dir.mkdir(exist_ok=True)
         
         if not self.feedback_file.exists():
-            default_feedback = {
-                "feedback_records": []
+            self.feedback_file.touch()
+
+        if not self.exercises_file.exists():
+            default_exercises = {
+                "exercises": [
+                    {
+                        "id": "EX001",
+                        "title": "Résolution d'équations du premier degré",
+                        "subject": "Mathématiques",
+                        "sub_topic": "Algèbre",
+                        "exercise_type": "Problèmes",
+                        "difficulty": 2,
+                        "duration": 20,
+                        "objective": "Isoler l'inconnue dans une équation linéaire",
+                        "focus_points": ["Transposer les termes", "Vérifier la solution"]
+                    },
+                    {
+                        "id": "EX002",
+                        "title": "Systèmes d'équations à deux inconnues",
+                        "subject": "Mathématiques",
+                        "sub_topic": "Algèbre",
+                        "exercise_type": "Problèmes",
+                        "difficulty": 3,
+                        "duration": 30,
+                        "objective": "Résoudre un système par substitution et par combinaison",
+                        "focus_points": ["Choisir la méthode adaptée", "Interpréter la solution"]
+                    },
+                    {
+                        "id": "EX003",
+                        "title": "Mesure de la chute libre",
+                        "subject": "Physique",
+                        "sub_topic": "Mécanique",
+                        "exercise_type": "Expériences",
+                        "difficulty": 3,
+                        "duration": 40,
+                        "objective": "Relier la hauteur de chute et le temps mesuré",
+                        "focus_points": ["Protocole de mesure", "Incertitudes", "Loi horaire"]
+                    },
+                    {
+                        "id": "EX004",
+                        "title": "Boucles et conditions",
+                        "subject": "Informatique",
+                        "sub_topic": "Programmation",
+                        "exercise_type": "Coding",
+                        "difficulty": 2,
+                        "duration": 25,
+                        "objective": "Écrire des boucles avec conditions d'arrêt correctes",
+                        "focus_points": ["Conditions de boucle", "Cas limites"]
+                    }
+                ]
             }
-            with open(self.feedback_file, "w", encoding='utf-8') as f:
-                json.dump(default_feedback, f, indent=4, ensure_ascii=False)
+            with open(self.exercises_file, "w", encoding='utf-8') as f:
+                json.dump(default_exercises, f, indent=4, ensure_ascii=False)
 
         # Initialiser les données d'apprentissage avec des données de test
         if not self.learning_data_file.exists():
@@ -72,17 +189,25 @@ class TutorAgent:
             with open(self.learning_data_file, "w", encoding='utf-8') as f:
                 json.dump(test_data, f, indent=4, ensure_ascii=False)
 
-    def provide_feedback(self, student_id, content_id=None):
-        """Fournit un feedback personnalisé et adaptatif"""
-        try:
-            # Charger les données d'apprentissage
-            with open(self.learning_data_file, "r", encoding='utf-8') as f:
-                learning_data = json.load(f)
+    def provide_feedback(self, student_id, content_id=None, sections=None):
+        """Fournit un feedback personnalisé et adaptatif
+
+        Les sections (toutes par défaut, ou celles listées dans ``sections``) ne sont
+        calculées qu'au moment où l'appelant les consulte. Une section inconnue lève ``ValueError``.
+        """
+        # Erreur de l'appelant, distincte d'un échec de calcul : elle n'est pas interceptée
+        sections = list(self.FEEDBACK_SECTIONS if sections is None else sections)
+        unknown = [section for section in sections if section not in self.FEEDBACK_SECTIONS]
+        if unknown:
+            raise ValueError(f"Sections de feedback inconnues: {', '.join(unknown)}")
 
-            # Initialiser les données pour un nouvel étudiant si nécessaire
-            student_records = [r for r in learning_data["learning_records"] if r["student_id"] == student_id]
+        try:
+            # Charger les données d'apprentissage de l'étudiant (sans réécrire le fichier)
+            with self.learning_log.lock:
+                data_version = self.learning_log.student_version(student_id)
+                student_records = self.learning_log.student_records(student_id)
             if not student_records:
-                # Créer des données initiales pour le nouvel étudiant
+                # Données initiales du nouvel étudiant, enregistrées en arrière-plan
                 initial_record = {
                     "student_id": student_id,
                     "timestamp": datetime.now().isoformat(),
@@ -93,37 +218,240 @@ class TutorAgent:
                     "time_spent": 0,
                     "success_rate": 0.0
                 }
-                learning_data["learning_records"].append(initial_record)
-                with open(self.learning_data_file, "w", encoding='utf-8') as f:
-                    json.dump(learning_data, f, indent=4, ensure_ascii=False)
+                self.record_writer.enqueue(initial_record, key=("initial", student_id))
                 student_records = [initial_record]
 
-            # Analyser les données
-            df = pd.DataFrame(student_records)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Générer le feedback
-            feedback = {
-                "timestamp": datetime.now().isoformat(),
-                "student_id": student_id,
-                "content_id": content_id,
-                "performance_summary": self._generate_performance_summary(df),
-                "learning_plan": self._generate_learning_plan(df),
-                "personalized_advice": self._generate_personalized_advice(df),
-                "adaptive_recommendations": self._generate_adaptive_recommendations(df),
-                "progress_tracking": self._track_detailed_progress(df),
-                "skill_assessment": self._assess_skills(df),
-                "engagement_metrics": self._analyze_engagement(df),
-                "learning_path": self._suggest_learning_path(df),
-                "mastery_tracking": self._track_mastery_levels(df)
-            }
+            # Sections déjà calculées sur la même version des données
+            stored = self.feedback_store.lookup(student_id, content_id, data_version) or {}
 
-            return feedback
+            # Le DataFrame n'est construit que si une section doit être recalculée
+            frame = {}
+            def load_frame():
+                if "df" not in frame:
+                    df = pd.DataFrame(student_records)
+                    df['timestamp'] = pd.to_datetime(df['timestamp'])
+                    frame["df"] = df
+                return frame["df"]
+
+            def store_section(section, value):
+                if isinstance(value, dict) and value.get("status") == "error":
+                    return
+                try:
+                    self.feedback_store.append(student_id, content_id, data_version, {section: value})
+                except Exception as e:
+                    print(f"Erreur lors de l'enregistrement du feedback: {str(e)}")
+            
+            # Générer le feedback, section par section à la demande
+            return FeedbackResult(
+                {
+                    "timestamp": stored.get("timestamp") or datetime.now().isoformat(),
+                    "student_id": student_id,
+                    "content_id": content_id,
+                    "data_version": data_version
+                },
+                {section: self._section_builder(section, load_frame) for section in sections},
+                values=stored.get("sections"),
+                on_compute=store_section
+            )
 
         except Exception as e:
             print(f"Erreur dans provide_feedback: {str(e)}")
             return {"status": "error", "message": "Erreur lors de la génération du feedback"}
 
+    def feedback_report(self, student_id, content_id=None, sections=None):
+        """Feedback entièrement calculé, sous forme de dictionnaire sérialisable (outils, API)"""
+        feedback = self.provide_feedback(student_id, content_id, sections)
+        return feedback.to_dict() if isinstance(feedback, FeedbackResult) else feedback
+
+    def _section_builder(self, section, load_frame):
+        """Retourne la fonction qui calcule une section du feedback"""
+        def build():
+            try:
+                return getattr(self, self.FEEDBACK_SECTIONS[section])(load_frame())
+            except Exception as e:
+                print(f"Erreur dans la section {section} du feedback: {str(e)}")
+                return {"status": "error", "message": f"Erreur lors de la génération de la section {section}"}
+        return build
+
+    def identify_struggles(self, student_id):
+        """Identifie les sous-thèmes sur lesquels l'étudiant est en difficulté"""
+        try:
+            self.learning_log.refresh()
+            return self.struggle_detector.struggles(student_id)
+        except Exception as e:
+            print(f"Erreur dans identify_struggles: {str(e)}")
+            return []
+
+    def suggest_exercises(self, student_id, sub_topic=None, count=3):
+        """Suggère des exercices ciblés sur les difficultés de l'étudiant"""
+        try:
+            exercises = []
+            for subject, topic, exercise_type, difficulty in self._exercise_targets(student_id, sub_topic):
+                missing = count - len(exercises)
+                if missing <= 0:
+                    break
+                found = self.exercise_bank.suggest(
+                    subject, topic, exercise_type, difficulty, count=missing,
+                    exclude=[e["id"] for e in exercises]
+                )
+                combination = (subject, topic, exercise_type, difficulty)
+                if len(found) < missing and self.exercise_bank.can_generate(combination):
+                    # Combinaison non couverte : générer les exercices manquants puis enrichir la banque
+                    generated = self._generate_exercises_with_gemini(
+                        subject, topic, exercise_type, difficulty, missing - len(found)
+                    )
+                    added = self.exercise_bank.add_generated(generated, subject, topic, exercise_type, difficulty)
+                    # Un échec (erreur ou aucun exercice valide) suspend la génération de la combinaison
+                    self.exercise_bank.record_generation(combination, bool(added))
+                    found += added
+                if len(found) < missing:
+                    # Sinon, des exercices du même sous-thème à une autre difficulté
+                    found += self.exercise_bank.suggest(
+                        subject, topic, exercise_type, count=missing - len(found),
+                        exclude=[e["id"] for e in exercises + found]
+                    )
+                exercises.extend(dict(exercise) for exercise in found[:missing])
+            return exercises
+        except Exception as e:
+            print(f"Erreur dans suggest_exercises: {str(e)}")
+            return []
+
+    def _exercise_targets(self, student_id, sub_topic=None):
+        """Sous-thèmes à travailler (sujet, sous-thème, type d'exercice, difficulté), par priorité"""
+        records = [r for r in self.learning_log.student_records(student_id) if r.get("content_type") != "initial"]
+        by_topic = {}
+        for record in records:
+            topic = record.get("sub_topic") or record.get("subject")
+            entry = by_topic.setdefault(topic, {"subject": record.get("subject"), "scores": [], "exercise_type": None})
+            if isinstance(record.get("score"), (int, float)):
+                entry["scores"].append(record["score"])
+            entry["exercise_type"] = record.get("exercise_type") or entry["exercise_type"]
+
+        def target(topic, level=None):
+            entry = by_topic.get(topic, {"subject": None, "scores": [], "exercise_type": None})
+            if level is None:
+                level = sum(entry["scores"]) / len(entry["scores"]) if entry["scores"] else 0.5
+            difficulty = int(min(5, max(1, round(level * 5))))
+            return entry["subject"], topic, entry["exercise_type"], difficulty
+
+        if sub_topic is not None:
+            return [target(sub_topic)]
+        targets = [target(s["sub_topic"], s["window_mean"]) for s in self.identify_struggles(student_id)]
+        # À défaut de difficulté détectée, les sous-thèmes les moins réussis
+        weakest = sorted(
+            (topic for topic, entry in by_topic.items() if entry["scores"]),
+            key=lambda topic: sum(by_topic[topic]["scores"]) / len(by_topic[topic]["scores"])
+        )
+        known = {t[1] for t in targets}
+        targets += [target(topic) for topic in weakest if topic not in known]
+        return targets
+
+    def _generate_exercises_with_gemini(self, subject, sub_topic, exercise_type, difficulty, count):
+        """Génère des exercices pour une combinaison absente de la banque"""
+        prompt = f"""Proposez {count} exercices d'entraînement ciblés en {subject or 'général'}, sous-thème "{sub_topic}",
+de type "{exercise_type or 'au choix'}" et de difficulté {difficulty}/5.
+Répondez uniquement par un tableau JSON d'objets au format :
+[{{"title": "titre court", "duration": durée en minutes (entier), "objective": "objectif pédagogique",
+"focus_points": ["point à travailler", "..."], "exercise_type": "{exercise_type or 'Problèmes'}", "difficulty": {difficulty}}}]"""
+        try:
+            content_str = self.model.generate_content(prompt).text
+            start_idx = content_str.find('[')
+            end_idx = content_str.rfind(']') + 1
+            if start_idx != -1 and end_idx > start_idx:
+                exercises = json.loads(content_str[start_idx:end_idx])
+                if isinstance(exercises, list):
+                    return exercises
+        except Exception as e:
+            print(f"Erreur lors de la génération d'exercices: {str(e)}")
+        return []
+
+    def suggest_learning_path(self, student_id, target):
+        """Parcours menant des contenus maîtrisés par l'étudiant à un contenu ou un module cible"""
+        try:
+            self.learning_log.refresh()
+            mastered = self._mastered_contents(student_id)
+            return {
+                "cible": target,
+                "plus_court_chemin": self.prerequisite_graph.shortest_path(mastered, target),
+                "prérequis_à_acquérir": self.prerequisite_graph.prerequisites_to_learn(mastered, target)
+            }
+        except Exception as e:
+            print(f"Erreur dans suggest_learning_path: {str(e)}")
+            return {"cible": target, "plus_court_chemin": [], "prérequis_à_acquérir": []}
+
+    def _mastered_contents(self, student_id):
+        """Contenus dont le score moyen de l'étudiant atteint le seuil de maîtrise"""
+        scores = {}
+        for record in self.learning_log.student_records(student_id):
+            if record.get("content_type") == "initial" or not isinstance(record.get("score"), (int, float)):
+                continue
+            scores.setdefault(record.get("content_id"), []).append(record["score"])
+        return {
+            content_id for content_id, values in scores.items()
+            if content_id is not None and sum(values) / len(values) >= self.MASTERY_THRESHOLD
+        }
+
+    def _suggest_learning_path(self, df):
+        """Suggère les prochains contenus à étudier d'après le graphe des prérequis"""
+        student_id = self._student_id(df)
+        mastered = self._mastered_contents(student_id)
+        # Contenus déjà abordés mais pas encore maîtrisés : prérequis manquants à reprendre
+        attempted = [c for c in dict.fromkeys(df['content_id'].dropna()) if c not in mastered] if 'content_id' in df.columns else []
+        to_consolidate = {}
+        for content_id in attempted:
+            missing = [
+                step for step in self.prerequisite_graph.prerequisites_to_learn(mastered, content_id)
+                if step.get("id") != content_id
+            ]
+            if missing:
+                to_consolidate[content_id] = missing
+        return {
+            "contenus_maîtrisés": sorted(mastered),
+            "prochaines_étapes": self.prerequisite_graph.next_steps(mastered),
+            "prérequis_à_consolider": to_consolidate
+        }
+
+    def refit_mastery_model(self):
+        """Réestime les paramètres BKT de chaque compétence à partir de l'historique complet"""
+        with self.learning_log.lock:
+            self.learning_log.refresh()
+            return self.knowledge_tracer.refit(self.learning_log.records())
+
+    def _skill_status(self, mastery):
+        if mastery >= self.SKILL_MASTERED:
+            return "maîtrisé"
+        if mastery >= self.SKILL_IN_PROGRESS:
+            return "en cours d'acquisition"
+        return "à renforcer"
+
+    def _track_mastery_levels(self, df):
+        """Niveau de maîtrise estimé de chaque compétence pratiquée par l'étudiant"""
+        levels = self.knowledge_tracer.student_mastery(self._student_id(df))
+        return {
+            skill: {
+                "probabilité_maîtrise": round(level["mastery"], 3),
+                "tentatives": level["attempts"],
+                "statut": self._skill_status(level["mastery"])
+            }
+            for skill, level in sorted(levels.items(), key=lambda item: -item[1]["mastery"])
+        }
+
+    def _assess_skills(self, df):
+        """Bilan des compétences : acquises, en cours d'acquisition et à renforcer"""
+        levels = self.knowledge_tracer.student_mastery(self._student_id(df))
+        assessment = {"compétences_maîtrisées": [], "en_cours_d_acquisition": [], "à_renforcer": []}
+        keys = {"maîtrisé": "compétences_maîtrisées", "en cours d'acquisition": "en_cours_d_acquisition",
+                "à renforcer": "à_renforcer"}
+        for skill, level in sorted(levels.items(), key=lambda item: -item[1]["mastery"]):
+            assessment[keys[self._skill_status(level["mastery"])]].append(skill)
+        masteries = [level["mastery"] for level in levels.values()]
+        assessment["niveau_global"] = round(sum(masteries) / len(masteries), 3) if masteries else 0.0
+        return assessment
+
+    def latest_feedback(self, student_ids=None, limit=None):
+        """Derniers feedbacks enregistrés pour plusieurs étudiants (vue enseignant)"""
+        return self.feedback_store.latest_for_students(student_ids, limit=limit)
+
     def _generate_performance_summary(self, df):
         """Génère un résumé détaillé des performances"""
         try:
@@ -164,10 +492,8 @@ class TutorAgent:
         """Génère un planning d'apprentissage personnalisé et adaptatif"""
         try:
             # Analyser les meilleures périodes d'apprentissage
-            if not df.empty and 'timestamp' in df.columns:
-                df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-                best_hours = df.groupby('hour')['score'].mean().nlargest(3).index.tolist()
-            else:
+            best_hours = self.time_index.best_hours(self._student_id(df), 3)
+            if not best_hours:
                 best_hours = [9, 14, 18]  # Heures par défaut
 
             return {
@@ -311,17 +637,15 @@ class TutorAgent:
     def _create_weekly_schedule(self, df):
         """Crée un planning hebdomadaire personnalisé"""
         # Analyser les jours les plus productifs
-        df['day'] = pd.to_datetime(df['timestamp']).dt.day_name()
-        best_days = df.groupby('day')['score'].mean().nlargest(4)
+        student_id = self._student_id(df)
+        best_days = self.time_index.best_days(student_id, 4)
         
         schedule = {}
-        days = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-        
-        for day in days:
-            if day in best_days.index:
+        for i, day in enumerate(self.WEEK_DAYS):
+            if i in best_days:
                 schedule[day] = {
-                    "sessions": [f"{hour}h00" for hour in df[df["day"] == day].groupby('hour')['score'].mean().nlargest(2).index.tolist()],
-                    "priorité": "haute" if day in best_days.nlargest(2).index else "moyenne",
+                    "sessions": [f"{hour}h00" for hour in self.time_index.best_hours(student_id, 2, day=i)],
+                    "priorité": "haute" if i in best_days[:2] else "moyenne",
                     "focus": self._suggest_daily_focus(df, day)
                 }
             else:
@@ -333,6 +657,92 @@ class TutorAgent:
                 
         return schedule
 
+    def get_due_reviews(self, student_id, now=None):
+        """Sous-thèmes qu'un étudiant doit réviser maintenant"""
+        self.learning_log.refresh()
+        return self.review_scheduler.due_for_student(student_id, now)
+
+    def next_due_reviews(self, limit=1000):
+        """Prochaines révisions planifiées, tous étudiants confondus"""
+        self.learning_log.refresh()
+        return self.review_scheduler.next_due(limit)
+
+    def save_review_schedule(self):
+        """Sauvegarde le planning des révisions"""
+        self.review_scheduler.save(self.review_schedule_file)
+
+    def schedule_reminders(self, student_ids=None, horizon_days=7, start=True):
+        """Programme les rappels de séances (créneaux préférés) et de révisions pour chaque étudiant"""
+        self.learning_log.refresh()
+        if student_ids is None:
+            student_ids = self.time_index.students()
+        now = datetime.now()
+        scheduled = 0
+        for student_id in student_ids:
+            # Mêmes créneaux que preferred_time_slots dans l'analyse des performances
+            hours = self.time_index.best_hours(student_id, 3) or [9, 14, 18]
+            days = self.time_index.best_days(student_id, 4) or None
+            for moment in next_occurrences(hours, days, horizon_days, now):
+                self.reminder_dispatcher.schedule(
+                    student_id, moment, "C'est le moment de votre séance d'apprentissage",
+                    kind="session", key=(student_id, "session", moment.isoformat())
+                )
+                scheduled += 1
+
+            # Révisions : au premier créneau préféré suivant l'échéance
+            for review in self.review_scheduler.next_due(limit=20, student_id=student_id):
+                due = max(datetime.fromisoformat(review["due"]), now)
+                if due > now + timedelta(days=horizon_days):
+                    break
+                moments = next_occurrences(hours, None, horizon_days, due - timedelta(seconds=1))
+                self.reminder_dispatcher.schedule(
+                    student_id, moments[0] if moments else due, f"Révision conseillée : {review['sub_topic']}",
+                    kind="review", key=(student_id, "review", review["sub_topic"], review["due"]),
+                    sub_topic=review["sub_topic"]
+                )
+                scheduled += 1
+
+        if start:
+            self.reminder_dispatcher.start()
+        return scheduled
+
+    def schedule_class(self, student_ids=None, tutors_per_hour=1, rooms_per_hour=1, group_size=5,
+                       sessions_per_student=2, max_choices=12):
+        """Répartit les séances de tutorat de toute une classe selon les créneaux préférés de chacun
+
+        ``tutors_per_hour`` et ``rooms_per_hour`` sont des nombres ou des tableaux 7 × 24.
+        """
+        self.learning_log.refresh()
+        if student_ids is None:
+            student_ids = self.time_index.students()
+        preferences = {
+            student_id: self._slot_preferences(student_id, max_choices) for student_id in student_ids
+        }
+        optimizer = ClassScheduleOptimizer(
+            capacity_matrix(tutors_per_hour, rooms_per_hour, group_size),
+            sessions_per_student=sessions_per_student,
+            max_choices=max_choices
+        )
+        return optimizer.optimize(preferences)
+
+    def _slot_preferences(self, student_id, k=12):
+        """Créneaux (jour, heure) préférés : meilleurs créneaux observés, puis meilleures heures et jours"""
+        slots = self.time_index.best_slots(student_id, k)
+        hours = self.time_index.best_hours(student_id, 3) or [9, 14, 18]
+        days = self.time_index.best_days(student_id, 7)
+        days += [day for day in range(5) if day not in days]
+        for day in days:
+            for hour in hours:
+                if len(slots) >= k:
+                    return slots
+                if (day, hour) not in slots:
+                    slots.append((day, hour))
+        return slots
+
+    def _student_id(self, df):
+        """Identifiant de l'étudiant dont les données sont analysées"""
+        return df['student_id'].iloc[0] if 'student_id' in df.columns and not df.empty else None
+
     def _generate_general_advice(self, df):
         """Génère des conseils généraux basés sur l'analyse des données"""
         advice = []
@@ -416,10 +826,9 @@ class TutorAgent:
         time_advice = []
         
         # Analyser les sessions les plus productives
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        best_hours = df.groupby('hour')['score'].mean().nlargest(3)
+        best_hours = self.time_index.best_hours(self._student_id(df), 3)
         
-        time_advice.append(f"Vos meilleures heures d'apprentissage sont : {', '.join([f'{h}h' for h in best_hours.index])}")
+        time_advice.append(f"Vos meilleures heures d'apprentissage sont : {', '.join([f'{h}h' for h in best_hours])}")
         
         # Conseils sur la durée des sessions
         optimal_duration = df.groupby(pd.qcut(df['time_spent'], 4))['score'].mean().idxmax()
@@ -430,8 +839,7 @@ class TutorAgent:
     def _suggest_daily_focus(self, df, day):
         """Suggère un focus d'apprentissage pour chaque jour"""
         # Analyser les performances par sujet pour ce jour
-        day_df = df[pd.to_datetime(df['timestamp']).dt.day_name() == day]
-        if len(day_df) > 0:
-            best_subject = day_df.groupby('subject')['score'].mean().idxmax()
+        best_subject = self.time_index.best_subject(self._student_id(df), self.WEEK_DAYS.index(day))
+        if best_subject is not None:
             return f"Focus sur {best_subject}"
         return "Révisions générales" 
\ No newline at end of file
@@ -1,53 +1,138 @@
 from crewai import Crew, Task
-from agents.crew_agents import AdaptiveLearningCrewAgents
+from agents.crew_agents import get_crew_agents
+from agents.crew_jobs import CrewJobQueue
+from agents.task_graph import TaskGraphExecutor
 import streamlit as st
+import os
 import time
 import threading
 
+@st.cache_resource
+def get_crew_job_queue():
+    """File des analyses en cours, partagée entre les sessions et les réexécutions"""
+    return CrewJobQueue(
+        execute_adaptive_learning_crew,
+        max_workers=int(os.getenv('CREW_JOB_WORKERS', 2)),
+        ttl=float(os.getenv('CREW_JOB_TTL', 3600))
+    )
+
 def run_adaptive_learning_crew(student_id=None, subject=None):
-    # Créer une instance de AdaptiveLearningCrewAgents
-    crew_agents = AdaptiveLearningCrewAgents()
+    """Soumet l'analyse en arrière-plan et retourne l'identifiant du job"""
+    return get_crew_job_queue().submit(student_id, subject)
+
+def run_crew_task(agent, description, expected_output):
+    """Exécute une tâche avec son agent et retourne la sortie texte"""
+    task = Task(description=description, agent=agent, expected_output=expected_output)
+    output = Crew(agents=[agent], tasks=[task], verbose=True).kickoff()
+    return getattr(output, "raw", str(output))
+
+def execute_adaptive_learning_crew(student_id=None, subject=None, report=None):
+    # Agents partagés par toutes les exécutions (créés au premier appel)
+    crew_agents = get_crew_agents()
     
     # Obtenir les agents
     student_agent = crew_agents.create_student_agent()
     content_agent = crew_agents.create_content_agent()
     tutor_agent = crew_agents.create_tutor_agent()
     
-    # Définir les tâches
-    tasks = [
-        Task(
-            description=f"Analyze learning patterns and progress for student {student_id}",
-            agent=student_agent,
-            expected_output="Detailed student learning profile and performance analysis"
-        ),
-        Task(
-            description=f"Generate personalized content recommendations for student {student_id} in {subject if subject else 'all subjects'}",
-            agent=content_agent,
-            expected_output="List of recommended learning materials and activities"
-        ),
-        Task(
-            description=f"Provide tutoring support and identify areas needing attention for student {student_id}",
-            agent=tutor_agent,
-            expected_output="Personalized tutoring recommendations and intervention strategies"
+    def analyze(inputs):
+        return {
+            "report": run_crew_task(
+                student_agent,
+                f"Analyze learning patterns and progress for student {student_id}",
+                "Detailed student learning profile and performance analysis"
+            ),
+            "performance": crew_agents.student_manager.analyze_performance(student_id)
+        }
+
+    def recommend(inputs):
+        # Les recommandations s'appuient sur l'analyse de l'étudiant
+        analysis = inputs["student_analysis"]["report"]
+        return {
+            "report": run_crew_task(
+                content_agent,
+                f"Generate personalized content recommendations for student {student_id} "
+                f"in {subject if subject else 'all subjects'}\n\nStudent analysis:\n{analysis}",
+                "List of recommended learning materials and activities"
+            ),
+            # L'agent a déjà pu interroger Gemini via son outil : les contenus affichés sont lus
+            # dans le catalogue, enrichi par ses recommandations, sans nouvel appel au LLM
+            "items": crew_agents.content_manager.recommend_from_catalog(
+                student_id, subject, crew_agents.student_manager.get_current_preferences(student_id)
+            )
+        }
+
+    def tutor(inputs):
+        return {
+            "report": run_crew_task(
+                tutor_agent,
+                f"Provide tutoring support and identify areas needing attention for student {student_id}",
+                "Personalized tutoring recommendations and intervention strategies"
+            ),
+            "struggles": crew_agents.tutor_manager.identify_struggles(student_id),
+            "exercises": crew_agents.tutor_manager.suggest_exercises(student_id)
+        }
+
+    # Le tutorat ne dépend pas de l'analyse : il s'exécute en parallèle de analyse -> recommandations
+    graph = TaskGraphExecutor()
+    graph.add_task("student_analysis", analyze)
+    graph.add_task("content_recommendation", recommend, depends_on=["student_analysis"])
+    graph.add_task("tutoring", tutor)
+    outputs = graph.run(on_result=report)
+    if not outputs:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in graph.errors.items()))
+    return merge_crew_outputs(outputs, graph.errors)
+
+def merge_crew_outputs(outputs, errors=None):
+    """Assemble les sorties des tâches dans le format attendu par l'interface
+
+    Les tâches en échec (ou non exécutées) sont signalées dans ``errors`` par leur nom.
+    """
+    analysis = outputs.get("student_analysis", {})
+    content = outputs.get("content_recommendation", {})
+    tutoring = outputs.get("tutoring", {})
+    
+    performance = analysis.get("performance") or {}
+    if performance.get("status") == "error":
+        performance = {}
+    strengths = performance.get("strengths") or {}
+    weaknesses = performance.get("weaknesses") or {}
+    
+    student_profile = {
+        key: performance[key]
+        for key in ("average_score", "completion_rate", "time_spent", "trends", "learning_patterns")
+        if key in performance
+    }
+    if analysis.get("report"):
+        student_profile["analyse"] = analysis["report"]
+    
+    content_recommendations = [
+        dict(
+            item,
+            id=item.get("id") or f"REC{i + 1:03d}",
+            title=item.get("title", "Contenu recommandé"),
+            type=item.get("type") or item.get("content_type", ""),
+            difficulty=item.get("difficulty", 3),
+            description=item.get("description", "")
         )
+        for i, item in enumerate(content.get("items") or [])
     ]
     
-    # Créer l'équipage
-    crew = Crew(
-        agents=[student_agent, content_agent, tutor_agent],
-        tasks=tasks,
-        verbose=True
-    )
-    
-    try:
-        # Lancer l'exécution
-        result = crew.kickoff()
-        return result
-    except KeyboardInterrupt:
-        print("\nArrêt du système d'apprentissage...")
-    except Exception as e:
-        print(f"Une erreur est survenue : {str(e)}")
-        return None
+    return {
+        "student_profile": student_profile,
+        "strengths": strengths.get("strong_subjects", []) + strengths.get("preferred_content_types", []),
+        "areas_to_improve": weaknesses.get("weak_subjects", []) + weaknesses.get("difficult_content_types", []),
+        "recommendations": [r for r in (content.get("report"), tutoring.get("report")) if r],
+        "content_recommendations": content_recommendations,
+        "tutor_support": {
+            "difficulties": [
+                f"{s['sub_topic']} ({s['subject']})" if s.get("subject") and s["subject"] != s["sub_topic"] else s["sub_topic"]
+                for s in tutoring.get("struggles") or []
+            ],
+            "exercises": tutoring.get("exercises") or []
+        },
+        "errors": dict(errors or {})
+    }
 
 def main():
     st.set_page_config(
@@ -68,19 +153,45 @@ def main():
         )
         
         if st.button("Démarrer l'Analyse", type="primary"):
-            with st.spinner("Analyse en cours..."):
-                result = run_adaptive_learning_crew(
-                    student_id=student_id,
-                    subject=subject if subject != "Tous les sujets" else None
-                )
-                if result:
-                    st.success("Analyse terminée !")
-                    st.session_state.analysis_result = result
+            job_id = run_adaptive_learning_crew(
+                student_id=student_id,
+                subject=subject if subject != "Tous les sujets" else None
+            )
+            if job_id:
+                st.session_state.crew_job_id = job_id
+            else:
+                st.error("Trop d'analyses en attente, réessayez dans quelques instants.")
+
+    # Suivi de l'analyse en cours
+    if "crew_job_id" in st.session_state:
+        job = get_crew_job_queue().status(st.session_state.crew_job_id)
+        if job is None:
+            del st.session_state.crew_job_id
+        elif job["status"] in ("pending", "running"):
+            st.info("Analyse en cours..." if job["status"] == "running" else "Analyse en attente...")
+            for name, output in job["partial_results"].items():
+                with st.expander(f"✓ {name}"):
+                    st.write(output)
+            # Interroger à nouveau l'état du job
+            time.sleep(1)
+            st.rerun()
+        else:
+            del st.session_state.crew_job_id
+            if job["status"] == "done":
+                # Un résultat vide reste une analyse réussie
+                st.success("Analyse terminée !")
+                st.session_state.analysis_result = job["result"] or {}
+            else:
+                st.error(f"Une erreur est survenue : {job['error']}")
 
     # Affichage des résultats
     if "analysis_result" in st.session_state:
         result = st.session_state.analysis_result
         
+        # Signaler les parties de l'analyse qui n'ont pas pu être produites
+        for name, error in result.get("errors", {}).items():
+            st.warning(f"Analyse incomplète ({name}) : {error}")
+        
         # Afficher les résultats de l'analyse
         col1, col2 = st.columns(2)
         
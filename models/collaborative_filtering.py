@@ -0,0 +1,135 @@
+import math
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+
+
+class CollaborativeFilteringRecommender:
+    """Recommandations « les étudiants comme vous ont réussi avec… » par factorisation de la matrice étudiant × contenu"""
+
+    def __init__(self, n_components=20, random_state=42):
+        self.n_components = n_components
+        self.random_state = random_state
+        self.student_ids = []
+        self.item_ids = []
+        self._student_index = {}
+        self._item_index = {}
+        self.ratings = sparse.csr_matrix((0, 0))
+        self.student_factors = np.zeros((0, 0))
+        self.item_factors = np.zeros((0, 0))
+        self.item_popularity = np.zeros(0)
+
+    def fit(self, records):
+        """Construit la matrice creuse des scores moyens et la factorise"""
+        sums = {}
+        for record in records:
+            content_id = record.get("content_id")
+            score = record.get("score")
+            if content_id is None or not isinstance(score, (int, float)) or math.isnan(score):
+                continue
+            key = (record.get("student_id"), content_id)
+            total = sums.setdefault(key, [0.0, 0])
+            total[0] += score
+            total[1] += 1
+
+        self.student_ids = sorted({student_id for student_id, _ in sums}, key=str)
+        self.item_ids = sorted({content_id for _, content_id in sums}, key=str)
+        self._student_index = {s: i for i, s in enumerate(self.student_ids)}
+        self._item_index = {c: i for i, c in enumerate(self.item_ids)}
+
+        rows = np.array([self._student_index[s] for s, _ in sums], dtype=np.int32)
+        cols = np.array([self._item_index[c] for _, c in sums], dtype=np.int32)
+        values = np.array([total / count for total, count in sums.values()])
+        self.ratings = sparse.csr_matrix(
+            (values, (rows, cols)), shape=(len(self.student_ids), len(self.item_ids))
+        )
+
+        # Popularité (score moyen par contenu) pour les étudiants sans historique
+        counts = np.bincount(cols, minlength=len(self.item_ids))
+        totals = np.bincount(cols, weights=values, minlength=len(self.item_ids))
+        self.item_popularity = np.divide(totals, counts, out=np.zeros(len(self.item_ids)), where=counts > 0)
+
+        n_components = min(self.n_components, len(self.item_ids) - 1, len(self.student_ids))
+        if n_components >= 1:
+            svd = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+            self.student_factors = svd.fit_transform(self.ratings)
+            self.item_factors = svd.components_
+        else:
+            self.student_factors = np.zeros((len(self.student_ids), 0))
+            self.item_factors = np.zeros((0, len(self.item_ids)))
+        return self
+
+    def fold_in(self, ratings):
+        """Projette les scores d'un étudiant (content_id → score) dans l'espace latent, sans réentraînement"""
+        vector = np.zeros(len(self.item_ids))
+        seen = np.zeros(len(self.item_ids), dtype=bool)
+        for content_id, score in ratings.items():
+            index = self._item_index.get(content_id)
+            if index is None:
+                continue
+            seen[index] = True
+            if score is not None and not math.isnan(score):
+                vector[index] = score
+        return vector @ self.item_factors.T, seen
+
+    def recommend(self, student_id, k=5, ratings=None):
+        """Top-k des contenus non encore vus, sous forme de liste (content_id, score prédit)"""
+        if not self.item_ids:
+            return []
+
+        if ratings:
+            embedding, seen = self.fold_in(ratings)
+        elif student_id in self._student_index:
+            row = self._student_index[student_id]
+            embedding = self.student_factors[row]
+            seen = np.zeros(len(self.item_ids), dtype=bool)
+            seen[self.ratings.indices[self.ratings.indptr[row]:self.ratings.indptr[row + 1]]] = True
+        else:
+            embedding, seen = None, np.zeros(len(self.item_ids), dtype=bool)
+
+        if embedding is None or not np.any(embedding):
+            scores = self.item_popularity.copy()
+        else:
+            scores = embedding @ self.item_factors
+        scores[seen] = -np.inf
+
+        available = int(np.count_nonzero(np.isfinite(scores)))
+        k = min(k, available)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.item_ids[i], float(scores[i])) for i in top]
+
+    def save(self, path):
+        """Sauvegarde le modèle au format NumPy compressé (identifiants en chaînes, sans pickle)"""
+        np.savez_compressed(
+            path,
+            student_ids=np.array([str(s) for s in self.student_ids], dtype=str),
+            item_ids=np.array([str(c) for c in self.item_ids], dtype=str),
+            student_factors=self.student_factors,
+            item_factors=self.item_factors,
+            item_popularity=self.item_popularity,
+            ratings_data=self.ratings.data,
+            ratings_indices=self.ratings.indices,
+            ratings_indptr=self.ratings.indptr,
+            n_components=self.n_components
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Charge un modèle sauvegardé"""
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(n_components=int(data["n_components"]))
+            model.student_ids = data["student_ids"].tolist()
+            model.item_ids = data["item_ids"].tolist()
+            model.student_factors = data["student_factors"]
+            model.item_factors = data["item_factors"]
+            model.item_popularity = data["item_popularity"]
+            model.ratings = sparse.csr_matrix(
+                (data["ratings_data"], data["ratings_indices"], data["ratings_indptr"]),
+                shape=(len(model.student_ids), len(model.item_ids))
+            )
+        model._student_index = {s: i for i, s in enumerate(model.student_ids)}
+        model._item_index = {c: i for i, c in enumerate(model.item_ids)}
+        return model
@@ -0,0 +1,177 @@
+import math
+import threading
+import numpy as np
+
+
+class _ParameterTable:
+    """Table de paramètres indexée par identifiant, stockée dans des tableaux NumPy extensibles"""
+
+    def __init__(self, capacity=64):
+        self.index = {}
+        self.ids = []
+        self.values = np.zeros(capacity)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, key, initial=0.0):
+        """Position d'un identifiant, créée avec une valeur initiale si nécessaire"""
+        position = self.index.get(key)
+        if position is None:
+            position = len(self.ids)
+            if position == len(self.values):
+                self.values = np.concatenate([self.values, np.zeros(len(self.values))])
+                self.counts = np.concatenate([self.counts, np.zeros(len(self.counts), dtype=np.int64)])
+            self.index[key] = position
+            self.ids.append(key)
+            self.values[position] = initial
+            self.counts[position] = 0
+        return position
+
+
+class DifficultyCalibrator:
+    """Calibration en ligne de la difficulté des contenus (Elo / IRT à un paramètre)
+
+    La probabilité de réussite d'un étudiant d'aptitude ``theta`` sur un contenu de difficulté
+    ``b`` vaut ``1 / (1 + exp(-(theta - b)))``. Chaque enregistrement ajuste ``theta`` et ``b``
+    en O(1) ; ``refit`` réestime tous les paramètres à partir de l'historique complet.
+    La difficulté calibrée est exprimée sur l'échelle 1-5 du catalogue (3 correspond à b = 0).
+    """
+
+    def __init__(self, k_item=0.4, k_student=0.4, k_min=0.05, prior_lookup=None):
+        self.k_item = k_item
+        self.k_student = k_student
+        self.k_min = k_min
+        self.prior_lookup = prior_lookup
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.items = _ParameterTable()
+            self.students = _ParameterTable()
+            self._priors = {}
+
+    def _to_logit(self, difficulty):
+        return float(np.clip(difficulty, 1, 5)) - 3.0
+
+    def _to_scale(self, logit):
+        return np.clip(logit + 3.0, 1, 5)
+
+    def _prior(self, content_id, record=None):
+        """Difficulté a priori : catalogue, sinon difficulté déclarée dans l'enregistrement"""
+        if content_id in self._priors:
+            return self._priors[content_id]
+        difficulty = self.prior_lookup(content_id) if self.prior_lookup else None
+        if difficulty is None and record is not None:
+            difficulty = record.get("difficulty_level")
+        try:
+            prior = self._to_logit(float(difficulty))
+        except (TypeError, ValueError):
+            prior = 0.0
+        self._priors[content_id] = prior
+        return prior
+
+    def _step(self, k, count):
+        # Pas décroissant avec le nombre d'observations, borné par k_min
+        return max(self.k_min, k / (1 + 0.1 * count))
+
+    def ingest(self, record):
+        content_id = record.get("content_id")
+        score = record.get("score")
+        if content_id is None or not isinstance(score, (int, float)) or math.isnan(score):
+            return
+        outcome = min(max(float(score), 0.0), 1.0)
+
+        with self._lock:
+            item = self.items.position(content_id, self._prior(content_id, record))
+            student = self.students.position(record.get("student_id"))
+            theta = self.students.values[student]
+            b = self.items.values[item]
+            expected = 1.0 / (1.0 + math.exp(-(theta - b)))
+
+            self.items.values[item] = b + self._step(self.k_item, self.items.counts[item]) * (expected - outcome)
+            self.students.values[student] = theta + self._step(self.k_student, self.students.counts[student]) * (outcome - expected)
+            self.items.counts[item] += 1
+            self.students.counts[student] += 1
+
+    def difficulty(self, content_id, min_observations=1):
+        """Difficulté calibrée (échelle 1-5), ou None si le contenu n'a pas assez d'observations"""
+        with self._lock:
+            position = self.items.index.get(content_id)
+            if position is None or self.items.counts[position] < min_observations:
+                return None
+            return float(self._to_scale(self.items.values[position]))
+
+    def difficulties(self, content_ids, min_observations=1):
+        """Difficultés calibrées d'une liste de contenus (NaN pour les contenus non calibrés)"""
+        with self._lock:
+            positions = np.array([self.items.index.get(cid, -1) for cid in content_ids], dtype=np.int64)
+            result = np.full(len(positions), np.nan)
+            known = positions >= 0
+            if np.any(known):
+                known_positions = positions[known]
+                values = self._to_scale(self.items.values[known_positions])
+                values[self.items.counts[known_positions] < min_observations] = np.nan
+                result[known] = values
+            return result
+
+    def success_probability(self, student_id, content_id):
+        """Probabilité de réussite prédite, ou None si l'étudiant ou le contenu est inconnu"""
+        with self._lock:
+            student = self.students.index.get(student_id)
+            item = self.items.index.get(content_id)
+            if student is None or item is None:
+                return None
+            return 1.0 / (1.0 + math.exp(-(self.students.values[student] - self.items.values[item])))
+
+    def item_count(self, content_id):
+        """Nombre d'observations d'un contenu"""
+        with self._lock:
+            position = self.items.index.get(content_id)
+            return 0 if position is None else int(self.items.counts[position])
+
+    def refit(self, records, iterations=300, learning_rate=0.5, l2=0.05):
+        """Réestime toutes les aptitudes et difficultés par maximum de vraisemblance vectorisé
+
+        Les difficultés a priori servent de régularisation : un contenu peu observé reste proche
+        de la difficulté déclarée par son auteur.
+        """
+        observations = [
+            r for r in records
+            if r.get("content_id") is not None
+            and isinstance(r.get("score"), (int, float)) and not math.isnan(r.get("score"))
+        ]
+
+        with self._lock:
+            items = _ParameterTable(max(64, len(observations)))
+            students = _ParameterTable(max(64, len(observations)))
+            item_idx = np.array([
+                items.position(r["content_id"], self._prior(r["content_id"], r)) for r in observations
+            ], dtype=np.int64)
+            student_idx = np.array([students.position(r.get("student_id")) for r in observations], dtype=np.int64)
+            outcomes = np.clip(np.array([float(r["score"]) for r in observations]), 0.0, 1.0)
+
+            n_items, n_students = len(items), len(students)
+            priors = items.values[:n_items].copy()
+            b = priors.copy()
+            theta = np.zeros(n_students)
+            item_counts = np.bincount(item_idx, minlength=n_items)
+            student_counts = np.bincount(student_idx, minlength=n_students)
+
+            for _ in range(iterations if len(observations) else 0):
+                expected = 1.0 / (1.0 + np.exp(-(theta[student_idx] - b[item_idx])))
+                residual = outcomes - expected
+                grad_theta = np.bincount(student_idx, weights=residual, minlength=n_students) - l2 * theta
+                grad_b = -np.bincount(item_idx, weights=residual, minlength=n_items) - l2 * (b - priors)
+                theta += learning_rate * grad_theta / np.maximum(student_counts, 1)
+                b += learning_rate * grad_b / np.maximum(item_counts, 1)
+
+            items.values[:n_items] = b
+            items.counts[:n_items] = item_counts
+            students.values[:n_students] = theta
+            students.counts[:n_students] = student_counts
+            self.items = items
+            self.students = students
+        return self
@@ -0,0 +1,208 @@
+import math
+import threading
+import numpy as np
+from models.difficulty_calibration import _ParameterTable
+
+
+class BayesianKnowledgeTracer:
+    """Suivi de la maîtrise par (étudiant, compétence) par Bayesian Knowledge Tracing
+
+    Chaque compétence (sous-thème, à défaut sujet) a quatre paramètres : maîtrise initiale
+    ``p_init``, apprentissage ``p_learn``, réussite sans maîtrise ``p_guess`` et erreur malgré
+    la maîtrise ``p_slip``. Un score au moins égal à ``correct_threshold`` compte comme une
+    réussite. Chaque enregistrement met à jour la probabilité de maîtrise en O(1) ; ``refit``
+    réestime les paramètres de toutes les compétences par EM (Baum-Welch) vectorisé.
+    """
+
+    PARAMETERS = ("p_init", "p_learn", "p_guess", "p_slip")
+
+    def __init__(self, p_init=0.3, p_learn=0.1, p_guess=0.2, p_slip=0.1, correct_threshold=0.6):
+        self.defaults = np.array([p_init, p_learn, p_guess, p_slip])
+        self.correct_threshold = correct_threshold
+        self._lock = threading.Lock()
+        self.skills = {}
+        self.parameters = np.tile(self.defaults, (64, 1))
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # Maîtrise (probabilité pour la prochaine tentative) et nombre de tentatives ;
+            # les paramètres des compétences sont conservés
+            self.states = _ParameterTable()
+            self._student_skills = {}
+
+    def _skill(self, skill):
+        position = self.skills.get(skill)
+        if position is None:
+            position = self.skills[skill] = len(self.skills)
+            if position == len(self.parameters):
+                self.parameters = np.concatenate([self.parameters, np.tile(self.defaults, (position, 1))])
+        return position
+
+    def _observation(self, record):
+        score = record.get("score")
+        skill = record.get("sub_topic") or record.get("subject")
+        if (record.get("content_type") == "initial" or skill is None
+                or not isinstance(score, (int, float)) or math.isnan(score)):
+            return None
+        return skill, score >= self.correct_threshold
+
+    def ingest(self, record):
+        observation = self._observation(record)
+        if observation is None:
+            return
+        skill, correct = observation
+        student_id = record.get("student_id")
+
+        with self._lock:
+            s = self._skill(skill)
+            p_init, p_learn, p_guess, p_slip = self.parameters[s]
+            position = self.states.position((student_id, skill), p_init)
+            self._student_skills.setdefault(student_id, {})[skill] = position
+
+            known = self.states.values[position]
+            if correct:
+                posterior = known * (1 - p_slip) / (known * (1 - p_slip) + (1 - known) * p_guess)
+            else:
+                posterior = known * p_slip / (known * p_slip + (1 - known) * (1 - p_guess))
+            self.states.values[position] = posterior + (1 - posterior) * p_learn
+            self.states.counts[position] += 1
+
+    def mastery(self, student_id, skill):
+        """Probabilité que l'étudiant maîtrise la compétence, ou None si elle n'a jamais été pratiquée"""
+        with self._lock:
+            position = self.states.index.get((student_id, skill))
+            return None if position is None else float(self.states.values[position])
+
+    def student_mastery(self, student_id):
+        """Maîtrise et nombre de tentatives de chaque compétence pratiquée par l'étudiant"""
+        with self._lock:
+            skills = self._student_skills.get(student_id, {})
+            positions = np.fromiter(skills.values(), dtype=np.int64, count=len(skills))
+            values = self.states.values[positions]
+            counts = self.states.counts[positions]
+            return {
+                skill: {"mastery": float(value), "attempts": int(count)}
+                for skill, value, count in zip(skills, values, counts)
+            }
+
+    def skill_parameters(self, skill):
+        """Paramètres BKT d'une compétence (valeurs par défaut si elle est inconnue)"""
+        with self._lock:
+            position = self.skills.get(skill)
+            values = self.defaults if position is None else self.parameters[position]
+            return {name: float(value) for name, value in zip(self.PARAMETERS, values)}
+
+    def refit(self, records, iterations=30, tolerance=1e-4, bounds=(0.001, 0.3), prior_strength=5.0):
+        """Réestime les paramètres de chaque compétence par EM sur l'historique complet
+
+        Les séquences (étudiant, compétence) sont traitées ensemble, un pas de temps à la fois :
+        la passe avant/arrière est vectorisée sur toutes les séquences encore actives à ce pas.
+        ``p_guess`` et ``p_slip`` sont bornés par ``bounds`` pour éviter les solutions dégénérées, et
+        une compétence peu observée reste proche des paramètres par défaut.
+        Les probabilités de maîtrise sont ensuite recalculées avec les nouveaux paramètres.
+        """
+        sequences = {}
+        for record in records:
+            observation = self._observation(record)
+            if observation is not None:
+                skill, correct = observation
+                sequences.setdefault((record.get("student_id"), skill), []).append(correct)
+
+        with self._lock:
+            # Séquences rangées par longueur décroissante : au pas t, les k premières sont actives
+            keys = sorted(sequences, key=lambda key: -len(sequences[key]))
+            lengths = np.array([len(sequences[key]) for key in keys], dtype=np.int64)
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+            observed = np.array([c for key in keys for c in sequences[key]], dtype=float)
+            skill_positions = {}
+            for _, skill in keys:
+                skill_positions.setdefault(skill, len(skill_positions))
+            seq_skill = np.array([skill_positions[skill] for _, skill in keys], dtype=np.int64)
+            n_skills = len(skill_positions)
+            max_length = int(lengths[0]) if len(lengths) else 0
+            active = [int(np.searchsorted(-lengths, -t, side="left")) for t in range(max_length + 1)]
+
+            params = np.tile(self.defaults, (n_skills, 1))
+            for skill, s in skill_positions.items():
+                if skill in self.skills:
+                    params[s] = self.parameters[self.skills[skill]]
+
+            def forward(params):
+                p_init, p_learn, p_guess, p_slip = (params[seq_skill, i] for i in range(4))
+                posterior = np.empty(len(observed))
+                known = p_init.copy()
+                for t in range(max_length):
+                    k = active[t]
+                    idx = starts[:k] + t
+                    o = observed[idx]
+                    known = known[:k]
+                    hit = np.where(o == 1, known * (1 - p_slip[:k]), known * p_slip[:k])
+                    miss = np.where(o == 1, (1 - known) * p_guess[:k], (1 - known) * (1 - p_guess[:k]))
+                    posterior[idx] = hit / np.maximum(hit + miss, 1e-12)
+                    known = posterior[idx] + (1 - posterior[idx]) * p_learn[:k]
+                return posterior
+
+            for _ in range(iterations if len(observed) else 0):
+                p_init, p_learn, p_guess, p_slip = (params[seq_skill, i] for i in range(4))
+                posterior = forward(params)
+
+                # Lissage arrière : gamma = P(maîtrise | toute la séquence), xi = P(apprentissage entre t et t+1)
+                gamma = posterior.copy()
+                learned = np.zeros(len(observed))
+                not_known_before = np.zeros(len(observed))
+                for t in range(max_length - 2, -1, -1):
+                    k = active[t + 1]
+                    idx = starts[:k] + t
+                    after = gamma[idx + 1]
+                    now = posterior[idx]
+                    predicted = np.maximum(now + (1 - now) * p_learn[:k], 1e-12)
+                    predicted_unknown = np.maximum((1 - now) * (1 - p_learn[:k]), 1e-12)
+                    gamma[idx] = now * after / predicted
+                    learned[idx] = (1 - now) * p_learn[:k] * after / predicted
+                    not_known_before[idx] = (1 - now) * (
+                        (1 - p_learn[:k]) * (1 - after) / predicted_unknown + p_learn[:k] * after / predicted
+                    )
+
+                position_skill = np.repeat(seq_skill, lengths)
+                unknown = 1 - gamma
+                first = gamma[starts]
+
+                def per_skill(weights, positions=position_skill):
+                    return np.bincount(positions, weights=weights, minlength=n_skills)
+
+                # Estimations lissées vers les valeurs par défaut (``prior_strength`` pseudo-observations)
+                numerators = np.column_stack([
+                    per_skill(first, seq_skill), per_skill(learned),
+                    per_skill(unknown * observed), per_skill(gamma * (1 - observed))
+                ])
+                denominators = np.column_stack([
+                    np.bincount(seq_skill, minlength=n_skills), per_skill(not_known_before),
+                    per_skill(unknown), per_skill(gamma)
+                ])
+                new = (numerators + prior_strength * self.defaults) / (denominators + prior_strength)
+                new[:, 0:2] = np.clip(new[:, 0:2], 0.001, 0.999)
+                new[:, 2:4] = np.clip(new[:, 2:4], *bounds)
+                converged = np.max(np.abs(new - params)) < tolerance
+                params = new
+                if converged:
+                    break
+
+            # Remplacer les tables par les paramètres réestimés et les maîtrises recalculées
+            for skill, s in skill_positions.items():
+                # _skill() peut agrandir self.parameters : la position doit être obtenue avant l'affectation
+                position = self._skill(skill)
+                self.parameters[position] = params[s]
+            posterior = forward(params)
+            states = _ParameterTable(max(64, len(keys)))
+            student_skills = {}
+            if len(keys):
+                last = posterior[starts + lengths - 1]
+                mastery = last + (1 - last) * params[seq_skill, 1]
+                for key, value, count in zip(keys, mastery, lengths):
+                    position = states.position(key, value)
+                    states.counts[position] = count
+                    student_skills.setdefault(key[0], {})[key[1]] = position
+            self.states = states
+            self._student_skills = student_skills
+        return self
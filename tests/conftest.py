@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Ajouter la racine du projet au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
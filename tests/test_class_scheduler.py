@@ -0,0 +1,33 @@
+import random
+import numpy as np
+from agents.class_scheduler import ClassScheduleOptimizer, capacity_matrix
+
+
+def test_fallback_prefers_nearest_hour_then_least_loaded_day():
+    capacity = np.zeros((7, 24), dtype=int)
+    capacity[0, 9] = 1           # premier choix de tous les étudiants
+    capacity[1, 11] = capacity[2, 11] = 2
+    capacity[3, 7] = 1
+    preferences = {student: [(0, 9)] for student in ("A", "B", "C", "D")}
+
+    result = ClassScheduleOptimizer(capacity, sessions_per_student=1).optimize(preferences)
+    slots = {student: (a["slots"][0]["day"], a["slots"][0]["hour"]) for student, a in result["assignments"].items()
+             if a["slots"]}
+
+    assert slots["A"] == ("Lundi", 9)
+    # À distance égale (2 h), 11 h et 7 h sont départagés par la charge puis par l'ordre des créneaux
+    assert sorted(slots[s] for s in ("B", "C", "D")) == [("Jeudi", 7), ("Mardi", 11), ("Mercredi", 11)]
+
+
+def test_saturated_class_fills_every_seat():
+    rng = random.Random(0)
+    hours = np.where((np.arange(24) >= 8) & (np.arange(24) < 22), 1, 0)
+    capacity = capacity_matrix(np.tile(hours, (7, 1)), 1, group_size=20)
+    preferences = {
+        student: [(rng.randrange(7), rng.randrange(16, 22)) for _ in range(12)] for student in range(1000)
+    }
+
+    summary = ClassScheduleOptimizer(capacity).optimize(preferences)["summary"]
+
+    assert summary["sessions_assigned"] == min(2000, int(capacity.sum()))
+    assert summary["capacity_utilization"] == 1.0
@@ -0,0 +1,22 @@
+import numpy as np
+from models.collaborative_filtering import CollaborativeFilteringRecommender
+
+
+def test_saved_model_loads_without_pickle(tmp_path):
+    rng = np.random.default_rng(0)
+    records = [
+        {"student_id": f"S{s}", "content_id": f"C{c}", "score": float(rng.random())}
+        for s in range(8) for c in range(6) if rng.random() < 0.7
+    ]
+    model = CollaborativeFilteringRecommender(n_components=3).fit(records)
+    path = tmp_path / "peer_model.npz"
+    model.save(path)
+
+    with np.load(path, allow_pickle=False) as data:
+        assert data["student_ids"].dtype.kind == "U"
+        assert data["item_ids"].dtype.kind == "U"
+
+    loaded = CollaborativeFilteringRecommender.load(path)
+    assert loaded.student_ids == model.student_ids
+    assert loaded.item_ids == model.item_ids
+    assert loaded.recommend("S1", k=3) == model.recommend("S1", k=3)
@@ -0,0 +1,47 @@
+import json
+import os
+from agents.content_catalog import ContentCatalog
+
+
+def _write(path, items):
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump({"content_items": items}, f)
+    # Forcer une nouvelle date de modification, même sur un système de fichiers peu précis
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_id_less_items_keep_their_key_across_saves_and_reloads(tmp_path):
+    path = tmp_path / "content.json"
+    _write(path, [{"id": "A", "subject": "Physique"}, {"title": "Sans identifiant", "subject": "Physique"}])
+    catalog = ContentCatalog(path)
+    catalog.add_items([{"id": "B", "subject": "Physique"}, {"title": "Autre", "subject": "Chimie"}])
+
+    with open(path, encoding='utf-8') as f:
+        items = json.load(f)["content_items"]
+    _write(path, list(reversed(items)))
+
+    assert len(catalog) == 4
+    assert sorted(item.get("title", item.get("id")) for item in catalog.query(subject="Physique")) == \
+        ["A", "B", "Sans identifiant"]
+
+
+def test_duplicate_ids_are_merged(tmp_path, capsys):
+    path = tmp_path / "content.json"
+    _write(path, [{"id": "A", "subject": "Physique", "difficulty": 2}, {"id": "A", "difficulty": 4}])
+    catalog = ContentCatalog(path)
+
+    assert len(catalog) == 1
+    assert catalog.get("A") == {"id": "A", "subject": "Physique", "difficulty": 4}
+    assert catalog.query(difficulty=2) == []
+    assert "double" in capsys.readouterr().out
+
+
+def test_difficulty_range_uses_exact_values(tmp_path):
+    path = tmp_path / "content.json"
+    _write(path, [{"id": "A", "difficulty": 2}, {"id": "B", "difficulty": 2.4}, {"id": "C", "difficulty": 1.6}])
+    catalog = ContentCatalog(path)
+
+    assert [item["id"] for item in catalog.query(max_difficulty=2)] == ["A", "C"]
+    assert [item["id"] for item in catalog.query(min_difficulty=2, max_difficulty=3)] == ["A", "B"]
+    assert [item["id"] for item in catalog.query(max_difficulty=2, limit=1)] == ["A"]
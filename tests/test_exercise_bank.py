@@ -0,0 +1,20 @@
+import json
+from agents.exercise_bank import ExerciseBank
+
+
+def test_only_failed_generations_are_throttled(tmp_path):
+    path = tmp_path / "exercises.json"
+    path.write_text(json.dumps({"exercises": []}), encoding='utf-8')
+    bank = ExerciseBank(path)
+    combination = ("Physique", "Optique", None, 3)
+
+    assert bank.can_generate(combination, now=0)
+    bank.record_generation(combination, succeeded=True, now=0)
+    assert bank.can_generate(combination, now=1)
+
+    bank.record_generation(combination, succeeded=False, now=10)
+    assert not bank.can_generate(combination, now=10 + ExerciseBank.GENERATION_RETRY_DELAY - 1)
+    assert bank.can_generate(combination, now=10 + ExerciseBank.GENERATION_RETRY_DELAY)
+
+    bank.record_generation(combination, succeeded=True, now=20)
+    assert bank.can_generate(combination, now=21)
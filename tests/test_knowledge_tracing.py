@@ -0,0 +1,44 @@
+import numpy as np
+from models.knowledge_tracing import BayesianKnowledgeTracer
+
+
+def _records(skills, students=30, attempts=12, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for student in range(students):
+        for skill in skills:
+            known = rng.random() < 0.3
+            for _ in range(attempts):
+                correct = rng.random() < (0.9 if known else 0.2)
+                records.append({"student_id": student, "sub_topic": skill, "score": 1.0 if correct else 0.0})
+                known = known or rng.random() < 0.15
+    return records
+
+
+def test_refit_keeps_parameters_beyond_initial_capacity():
+    skills = [f"skill-{i}" for i in range(150)]
+    records = _records(skills)
+    tracer = BayesianKnowledgeTracer()
+    tracer.refit(records)
+
+    assert len(tracer.parameters) >= len(skills)
+    defaults = tracer.skill_parameters("unknown")
+    for skill in skills:
+        assert tracer.skill_parameters(skill) != defaults
+
+
+def test_refit_matches_incremental_updates():
+    records = _records(["algebre", "geometrie"], students=50)
+    fitted = BayesianKnowledgeTracer().refit(records)
+
+    replay = BayesianKnowledgeTracer()
+    replay.skills = dict(fitted.skills)
+    replay.parameters = fitted.parameters.copy()
+    for record in records:
+        replay.ingest(record)
+
+    for student in range(50):
+        expected = fitted.student_mastery(student)
+        for skill, level in replay.student_mastery(student).items():
+            assert abs(level["mastery"] - expected[skill]["mastery"]) < 1e-9
+            assert level["attempts"] == expected[skill]["attempts"]
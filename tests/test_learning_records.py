@@ -0,0 +1,57 @@
+import json
+import os
+from agents.feedback_store import FeedbackStore
+from agents.learning_records import LearningRecordLog
+
+
+def _write(path, records):
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump({"learning_records": records}, f)
+    # Forcer une nouvelle date de modification, même sur un système de fichiers peu précis
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def _records(scores):
+    return [{"student_id": "S1", "content_id": f"C{i}", "score": score} for i, score in enumerate(scores)]
+
+
+def test_feedback_is_recomputed_after_restart_on_edited_data(tmp_path):
+    data_file = tmp_path / "learning_data.json"
+    history_file = tmp_path / "feedback_history.jsonl"
+    _write(data_file, _records([0.4, 0.6, 0.8]))
+
+    version = LearningRecordLog(data_file).student_version("S1")
+    FeedbackStore(history_file).append("S1", None, version, {"performance_analysis": {"average": 0.6}})
+
+    # Redémarrage avec des données identiques : le feedback stocké reste valide
+    assert FeedbackStore(history_file).lookup("S1", None, LearningRecordLog(data_file).student_version("S1"))
+
+    # Redémarrage après modification d'un score (même nombre d'enregistrements) : à recalculer
+    _write(data_file, _records([0.4, 0.9, 0.8]))
+    new_version = LearningRecordLog(data_file).student_version("S1")
+    assert new_version != version
+    assert FeedbackStore(history_file).lookup("S1", None, new_version) is None
+
+
+def test_in_place_edit_is_not_taken_for_an_append(tmp_path):
+    class Counter:
+        def __init__(self):
+            self.records = []
+
+        def ingest(self, record):
+            self.records.append(record)
+
+        def reset(self):
+            self.records = []
+
+    data_file = tmp_path / "learning_data.json"
+    _write(data_file, _records([0.4, 0.6]))
+    log = LearningRecordLog(data_file)
+    counter = log.subscribe(Counter())
+    version = log.student_version("S1")
+
+    _write(data_file, _records([0.5, 0.6, 0.7]))
+    log.refresh()
+    assert [r["score"] for r in counter.records] == [0.5, 0.6, 0.7]
+    assert log.student_version("S1") != version
@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+import pytest
+from agents.llm_gateway import FakeBackend, LLMGateway, LLMGatewayError, LLMResponse, TokenBucket
+
+
+class FakeClock:
+    """Horloge manuelle : ``sleep`` avance le temps au lieu d'attendre"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _gateway(backend, clock=None, **kwargs):
+    clock = clock or FakeClock()
+    options = dict(rate_per_second=1000, burst=1000, max_in_flight=4, base_delay=0.5, max_delay=8.0,
+                   acquire_timeout=1.0, clock=clock, sleep=clock.sleep, rng=random.Random(0))
+    options.update(kwargs)
+    return LLMGateway(backend, **options)
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition non atteinte"
+        time.sleep(0.001)
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.acquire()
+    assert clock.now == pytest.approx(0.5)
+    assert not bucket.acquire(tokens=2, timeout=0.1)
+
+
+def test_gateway_rate_limits_calls():
+    clock = FakeClock()
+    backend = FakeBackend(responder=lambda prompt: prompt)
+    gateway = _gateway(backend, clock, rate_per_second=1, burst=1)
+
+    for i in range(3):
+        assert gateway.generate_content(f"prompt {i}").text == f"prompt {i}"
+    assert backend.calls == 3
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_in_flight_cap_bounds_concurrent_calls():
+    release = threading.Event()
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def responder(prompt):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        release.wait(5)
+        with lock:
+            state["running"] -= 1
+        return prompt
+
+    backend = FakeBackend(responder=responder)
+    gateway = _gateway(backend, max_in_flight=2, acquire_timeout=5.0)
+    threads = [threading.Thread(target=gateway.generate_content, args=(f"p{i}",)) for i in range(4)]
+    for thread in threads[:2]:
+        thread.start()
+    _wait_until(lambda: backend.calls == 2)
+
+    # Tous les emplacements sont occupés : une nouvelle requête expire
+    gateway.acquire_timeout = 0.01
+    with pytest.raises(LLMGatewayError):
+        gateway.generate_content("p-extra")
+    gateway.acquire_timeout = 5.0
+
+    # Les requêtes suivantes attendent qu'un emplacement se libère
+    for thread in threads[2:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert state["peak"] == 2
+    assert backend.calls == 4
+
+
+def test_identical_prompts_are_coalesced():
+    release = threading.Event()
+    backend = FakeBackend(responder=lambda prompt: release.wait(5) and "réponse")
+    gateway = _gateway(backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.generate_content("même prompt").text))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: gateway.stats()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["réponse"] * 3
+    assert backend.calls == 1
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_transient_errors_are_retried_with_bounded_jitter():
+    clock = FakeClock()
+    backend = FakeBackend(responder=lambda prompt: "ok", failures=2)
+    gateway = _gateway(backend, clock)
+
+    assert gateway.generate_content("p").text == "ok"
+    stats = gateway.stats()
+    assert (stats["upstream_calls"], stats["retries"], stats["failures"]) == (3, 2, 0)
+    assert len(clock.sleeps) == 2
+    for attempt, delay in enumerate(clock.sleeps):
+        assert 0 <= delay <= 0.5 * 2 ** attempt
+
+
+def test_retries_stop_after_max_retries_and_on_permanent_errors():
+    backend = FakeBackend(failures=10)
+    gateway = _gateway(backend, max_retries=2)
+    with pytest.raises(Exception, match="Quota"):
+        gateway.generate_content("p")
+    assert backend.calls == 3
+
+    class BrokenBackend:
+        calls = 0
+
+        def generate_content(self, prompt, **kwargs):
+            self.calls += 1
+            raise ValueError("requête invalide")
+
+    broken = BrokenBackend()
+    gateway = _gateway(broken)
+    with pytest.raises(ValueError):
+        gateway.generate_content("p")
+    assert broken.calls == 1
+    assert gateway.stats()["failures"] == 1
+
+
+def test_stream_takes_its_slot_only_while_iterated():
+    backend = FakeBackend(responder=lambda prompt: "x" * 100, chunk_size=40)
+    gateway = _gateway(backend, max_in_flight=1, acquire_timeout=0.01)
+
+    gateway.generate_content("jamais lu", stream=True)
+    assert backend.calls == 0
+    assert gateway.generate_content("p").text == "x" * 100
+
+    stream = gateway.generate_content("flux", stream=True)
+    next(stream)
+    with pytest.raises(LLMGatewayError):
+        gateway.generate_content("autre")
+    stream.close()
+    assert gateway.generate_content("autre").text == "x" * 100
+
+
+def test_stream_retries_only_before_the_first_chunk():
+    clock = FakeClock()
+    backend = FakeBackend(responder=lambda prompt: "abcdef", failures=2, chunk_size=2)
+    gateway = _gateway(backend, clock)
+    assert "".join(chunk.text for chunk in gateway.generate_content("p", stream=True)) == "abcdef"
+    assert gateway.stats()["retries"] == 2
+
+    class FailingStream:
+        calls = 0
+
+        def generate_content(self, prompt, stream=False, **kwargs):
+            self.calls += 1
+
+            def chunks():
+                yield LLMResponse("début")
+                raise TimeoutError("coupure")
+            return chunks()
+
+    failing = FailingStream()
+    gateway = _gateway(failing, max_in_flight=1, acquire_timeout=0.01)
+    stream = gateway.generate_content("p", stream=True)
+    assert next(stream).text == "début"
+    with pytest.raises(TimeoutError):
+        next(stream)
+    assert failing.calls == 1
+    assert gateway.stats()["failures"] == 1
+    # L'emplacement a été libéré malgré l'erreur
+    assert next(gateway.generate_content("q", stream=True)).text == "début"
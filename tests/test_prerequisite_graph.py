@@ -0,0 +1,36 @@
+import json
+from agents.content_catalog import ContentCatalog
+from agents.prerequisite_graph import PrerequisiteGraph
+
+
+def _graph(tmp_path, items):
+    path = tmp_path / "content.json"
+    path.write_text(json.dumps({"content_items": items}), encoding='utf-8')
+    return PrerequisiteGraph(ContentCatalog(path))
+
+
+def test_module_prerequisite_requires_all_its_contents(tmp_path):
+    graph = _graph(tmp_path, [
+        {"id": "ALG1", "title": "Équations", "module": "Algèbre"},
+        {"id": "ALG2", "title": "Systèmes", "module": "Algèbre"},
+        {"id": "ANA1", "title": "Fonctions", "module": "Analyse", "prerequisites": ["Algèbre"]}
+    ])
+
+    steps = [step["id"] for step in graph.next_steps(["ALG1"])]
+    assert steps == ["ALG2"]
+    assert [c["id"] for c in graph.prerequisites_to_learn(["ALG1"], "ANA1")] == ["ALG2", "ANA1"]
+
+    assert [step["id"] for step in graph.next_steps(["ALG1", "ALG2"])] == ["ANA1"]
+    assert [c["id"] for c in graph.prerequisites_to_learn(["ALG1", "ALG2"], "ANA1")] == ["ANA1"]
+
+
+def test_next_steps_have_nothing_left_to_learn_but_themselves(tmp_path):
+    graph = _graph(tmp_path, [
+        {"id": "A", "module": "M1"},
+        {"id": "B", "module": "M1", "prerequisites": ["A"]},
+        {"id": "C", "module": "M2", "prerequisites": ["M1"]},
+        {"id": "D", "prerequisites": ["C", "M2"]}
+    ])
+    for mastered in ([], ["A"], ["A", "B"], ["A", "B", "C"]):
+        for step in graph.next_steps(mastered):
+            assert [c["id"] for c in graph.prerequisites_to_learn(mastered, step["id"])] == [step["id"]]
@@ -0,0 +1,38 @@
+from agents.reminders import ReminderDispatcher
+
+
+class _ListSink:
+    def __init__(self):
+        self.reminders = []
+
+    def deliver(self, reminders):
+        self.reminders.extend(reminders)
+
+
+def test_cancel_ignores_delivered_and_unknown_reminders():
+    sink = _ListSink()
+    dispatcher = ReminderDispatcher(sink, clock=lambda: 0.0)
+    sent = dispatcher.schedule("S1", 5.0, "séance", key=("S1", "a"))
+    waiting = dispatcher.schedule("S1", 50.0, "révision", key=("S1", "b"))
+
+    assert dispatcher.dispatch_due(10.0) == 1
+    assert not dispatcher.cancel(sent)
+    assert not dispatcher.cancel(12345)
+    assert dispatcher.pending_count() == 1
+
+    assert dispatcher.cancel(waiting)
+    assert not dispatcher.cancel(waiting)
+    assert dispatcher.pending_count() == 0
+    assert dispatcher.dispatch_due(60.0) == 0
+    assert [r["id"] for r in sink.reminders] == [sent]
+
+
+def test_cancelled_key_can_be_scheduled_again():
+    dispatcher = ReminderDispatcher(_ListSink(), clock=lambda: 0.0)
+    first = dispatcher.schedule("S1", 50.0, "séance", key="k")
+    dispatcher.cancel(first)
+    second = dispatcher.schedule("S1", 50.0, "séance", key="k")
+
+    assert second != first
+    assert dispatcher.pending_count() == 1
+    assert dispatcher.dispatch_due(60.0) == 1
@@ -11,7 +11,8 @@ from datetime import datetime
 # Ajouter le répertoire parent au PYTHONPATH
 sys.path.append(str(Path(__file__).parent.parent))
 
-from agents.crew_agents import AdaptiveLearningCrewAgents
+from agents.crew_agents import get_crew_agents, add_reload_hook, reload_crew_agents
+from agents.recommendation_worker import RecommendationPrecomputeWorker
 
 # Configuration de la page
 st.set_page_config(
@@ -20,8 +21,31 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialisation des agents
-crew_agents = AdaptiveLearningCrewAgents()
+# Agents partagés par toutes les sessions et réexécutions (créés au premier accès)
+crew_agents = get_crew_agents()
+
+@st.cache_resource
+def get_precompute_worker(_crew_agents):
+    """Worker de précalcul des recommandations, partagé entre les sessions"""
+    worker = RecommendationPrecomputeWorker(_crew_agents.content_manager, _crew_agents.student_manager).start()
+
+    def on_reload(new_agents):
+        # Le worker est recréé avec les nouveaux agents à la prochaine exécution, avec son propre hook
+        unregister()
+        worker.stop()
+        get_precompute_worker.clear()
+
+    unregister = add_reload_hook(on_reload)
+    return worker
+
+precompute_worker = get_precompute_worker(crew_agents)
+
+@st.cache_resource
+def start_reminders(_crew_agents):
+    """Programme les rappels de tous les étudiants et démarre leur envoi, une fois par processus"""
+    return _crew_agents.tutor_manager.schedule_reminders()
+
+start_reminders(crew_agents)
 
 # Titre
 st.title("📚 Système d'Apprentissage Adaptatif")
@@ -45,6 +69,8 @@ if "learning_style" not in st.session_state:
     if learning_style:
         st.session_state.learning_style = learning_style
         st.session_state.show_questionnaire = False
+        # Compléter les rappels de l'étudiant (les rappels déjà programmés ne sont pas dupliqués)
+        crew_agents.tutor_manager.schedule_reminders([student_id])
 
 # Sidebar - Partie 2 : Autres configurations
 with st.sidebar:
@@ -132,6 +158,11 @@ with st.sidebar:
         else:
             st.error("❌ Erreur lors de la mise à jour des préférences.")
 
+    # Rechargement des agents (configuration .env, modèle LLM)
+    if st.button("Recharger les agents"):
+        reload_crew_agents(reload_model=True)
+        st.rerun()
+
 # Affichage du questionnaire ou du contenu principal
 if st.session_state.show_questionnaire:
     st.header("🎯 Détermination du Style d'Apprentissage")
@@ -228,12 +259,42 @@ user_preferences = {
     "learning_goal": learning_goal
 }
 
-# Obtenir les recommandations
-recommendations = crew_agents.content_manager.recommend_content(
-    student_id, 
-    subject=selected_subject,
-    preferences=user_preferences
-)
+# Utiliser les recommandations précalculées si elles existent, en les rafraîchissant en arrière-plan
+precomputed = precompute_worker.get_precomputed(student_id, selected_subject, user_preferences)
+if precomputed:
+    recommendations = precomputed["recommendations"]
+    computed_at = datetime.fromisoformat(precomputed["computed_at"])
+    st.caption(f"Recommandations calculées le {computed_at.strftime('%d/%m/%Y à %H:%M')}")
+    if not precompute_worker.is_fresh(precomputed):
+        precompute_worker.notify(student_id, selected_subject, user_preferences)
+else:
+    # Obtenir les recommandations en flux : chacune est affichée dès qu'elle est générée
+    recommendations = []
+    stream_placeholder = st.empty()
+    for content in crew_agents.content_manager.stream_recommendations(
+        student_id,
+        subject=selected_subject,
+        preferences=user_preferences
+    ):
+        recommendations.append(content)
+        with stream_placeholder.container():
+            st.caption("Génération des recommandations en cours...")
+            for rec in recommendations:
+                st.write(f"📖 {rec.get('title', '')}")
+    stream_placeholder.empty()
+
+    # Repli sur la génération complète (avec tentatives multiples) si le flux n'a rien produit
+    if not recommendations:
+        recommendations = crew_agents.content_manager.recommend_content(
+            student_id, 
+            subject=selected_subject,
+            preferences=user_preferences
+        )
+    else:
+        recommendations.sort(key=lambda x: x['relevance_score'], reverse=True)
+    
+    if recommendations:
+        precompute_worker.store(student_id, selected_subject, user_preferences, recommendations)
 
 if recommendations:
     for i, content in enumerate(recommendations):
@@ -294,11 +355,17 @@ else:
 if recommendations:
     st.header("📅 Planning d'Apprentissage Recommandé")
     
-    # Obtenir le feedback du tuteur
-    tutor_feedback = crew_agents.tutor_manager.provide_feedback(student_id)
+    # Obtenir le feedback du tuteur (seul le plan d'apprentissage est calculé)
+    tutor_feedback = crew_agents.tutor_manager.provide_feedback(student_id, sections=["learning_plan"])
     
     # Afficher le planning hebdomadaire
     st.subheader("Programme de la Semaine")
+    learning_plan = tutor_feedback.get("learning_plan") or {}
+    if learning_plan.get("fréquence_recommandée"):
+        st.caption(
+            f"Rythme conseillé par le tuteur : {learning_plan['fréquence_recommandée']}"
+            f" — {learning_plan.get('durée_optimale', '30 à 45 minutes')} par session"
+        )
     
     # Créer des colonnes pour les jours de la semaine
     cols = st.columns(3)